@@ -0,0 +1,202 @@
+'''
+Probability-density targeting. For every ship that is still afloat, count all
+the placements that are legal given the marks the opponent can see (a placement
+may not cover a 'M' or 'S' cell) and fire at the cell covered by the most
+placements. Placements over 'H' cells are weighted up so that once a ship has
+been hit the AI finishes it off (target mode) instead of hunting elsewhere.
+
+All the counting is done with NumPy window sums, one pass per ship size and
+orientation.
+'''
+
+from collections import Counter
+
+import numpy as np
+
+
+#cell codes of an opponent view
+UNKNOWN = 0
+MISS = 1
+HIT = 2
+SUNK = 3
+
+#weight of a placement per 'H' cell it covers
+HIT_WEIGHT = 50
+
+CODES = {'M': MISS, 'H': HIT, 'S': SUNK}
+
+
+def opponent_view(board):
+    '''
+    This function converts a board matrix into the opponent's view as shown by
+    BattleShip.print_board_opp_pov: ship ID numbers are hidden and only the
+    'M', 'H' and 'S' marks are kept.
+
+    Args:
+        board: a matrix as in PersonalBoard.board
+
+    Returns: 2D int8 array of cell codes
+    '''
+    return np.array([[CODES.get(val, UNKNOWN) for val in row] for row in board],
+                    dtype=np.int8)
+
+
+#window sums of the combined cell values below BLOCKED mean the window does not
+#cover any 'M' or 'S' cell, and are then equal to the number of 'H' cells
+BLOCKED = 1 << 12
+
+#index arrays used by _spread, keyed by (length of the line, ship size)
+_SPREAD = {}
+
+
+def _prefix(a):
+    '''
+    Returns the cumulative sums of the rows of a with a leading column of zeros,
+    so that the sum of a[:, i:j] is p[:, j] - p[:, i].
+    '''
+    p = np.zeros((a.shape[0], a.shape[1]+1), dtype=np.int64)
+    np.cumsum(a, axis=1, out=p[:, 1:])
+    return p
+
+
+def _spread(w, size, length):
+    '''
+    Given the weight of every placement start along the rows, returns for every
+    cell the total weight of the placements of the given size covering it.
+    '''
+    key = (length, size)
+    if key not in _SPREAD:
+        cells = np.arange(1, length+1)
+        _SPREAD[key] = (np.minimum(cells, length - size + 1),
+                        np.maximum(cells - size, 0))
+    high, low = _SPREAD[key]
+    p = _prefix(w)
+    return p[:, high] - p[:, low]
+
+
+def _row_density(values, sizes):
+    '''
+    Returns the weighted number of horizontal placements covering every cell,
+    where values holds BLOCKED for 'M' and 'S' cells and 1 for 'H' cells.
+    '''
+    length = values.shape[1]
+    p = _prefix(values)
+    total = np.zeros(values.shape, dtype=np.int64)
+    for size, count in sizes.items():
+        if size > length:
+            continue
+        windows = p[:, size:] - p[:, :-size]
+        weight = np.where(windows < BLOCKED, 1 + HIT_WEIGHT * windows, 0)
+        total += count * _spread(weight, size, length)
+    return total
+
+
+def density(view, sizes):
+    '''
+    This function counts, for every cell, the weighted number of legal
+    placements of the given ships that cover it.
+
+    Args:
+        view: 2D array of cell codes (see opponent_view)
+        sizes: sizes of the ships that have not been sunk
+
+    Returns: 2D int array with the same shape as view
+    '''
+    values = np.where((view == MISS) | (view == SUNK), BLOCKED,
+                      (view == HIT).astype(np.int64))
+    sizes = Counter(sizes)
+    rows, cols = values.shape
+    #on a square board both orientations are counted in a single pass
+    if rows == cols:
+        both = _row_density(np.concatenate((values, values.T)), sizes)
+        return both[:rows] + both[rows:].T
+    return _row_density(values, sizes) + _row_density(values.T, sizes).T
+
+
+def best_shot(view, sizes):
+    '''
+    This function returns the cell that has not been attacked yet with the
+    highest placement density.
+
+    Args:
+        view: 2D array of cell codes (see opponent_view)
+        sizes: sizes of the ships that have not been sunk
+
+    Returns: tuple with board coordinates
+    '''
+    scores = density(view, sizes)
+    scores[view != UNKNOWN] = -1
+    x, y = np.unravel_index(np.argmax(scores), scores.shape)
+    return int(x), int(y)
+
+
+class DensityShooter(object):
+    '''
+    Firing strategy for the simulator (see simulate.py) that keeps its own view
+    of the opponent's board and always fires at best_shot.
+    '''
+
+    def __init__(self, rng, config, book = None):
+        '''
+        Starts with an empty view and the whole fleet afloat.
+
+        Args:
+            rng: random.Random instance, unused since the strategy is
+                 deterministic
+            config: the GameConfig of the game
+            book: optional opening.OpeningBook consulted before computing
+                  densities
+        '''
+        self.config = config
+        self.book = book
+        self.view = np.zeros((config.rows, config.cols), dtype=np.int8)
+        self.sizes = config.sizes()
+
+    def next_shot(self):
+        '''
+        Returns the densest cell that has not been attacked, from the opening
+        book if the view is in it.
+        '''
+        if self.book is not None:
+            cell = self.book.lookup(self.view, self.sizes)
+            if cell is not None:
+                return cell
+        return best_shot(self.view, self.sizes)
+
+    def record(self, cell, result):
+        '''
+        Marks the attacked cell on the view. When a ship sinks, the cells of the
+        ship are found among the 'H' cells in line with the attacked cell and
+        marked 'S'.
+        '''
+        x, y = cell
+        if result == 'miss':
+            self.view[x, y] = MISS
+            return
+        self.view[x, y] = HIT
+        if result == 'hit':
+            return
+        size = self.config.types[result[len('sunk: '):]][1]
+        self.sizes.remove(size)
+        for dx, dy in ((0, 1), (1, 0)):
+            #run of 'H' cells through the attacked cell along this direction
+            low = 0
+            while self._is_hit(x - (low+1)*dx, y - (low+1)*dy):
+                low += 1
+            high = 0
+            while self._is_hit(x + (high+1)*dx, y + (high+1)*dy):
+                high += 1
+            if low + high + 1 >= size:
+                #the ship ends at the attacked cell if it can, since the
+                #sinking shot is usually the last one of a line of hits
+                back = min(low, size - 1)
+                for i in range(-back, size - back):
+                    self.view[x + i*dx, y + i*dy] = SUNK
+                return
+
+    def _is_hit(self, x, y):
+        '''
+        Returns True if (x, y) is on the board and marked 'H' in the view.
+        '''
+        return (0 <= x < self.view.shape[0] and 0 <= y < self.view.shape[1]
+                and self.view[x, y] == HIT)
@@ -0,0 +1,547 @@
+'''
+Benchmark suite of the engine. Every case prepares its state from a fixed seed
+outside the timed region, runs warmup rounds and then times several repeats;
+the best repeat is reported in nanoseconds per operation. Results are JSON,
+and compare checks them against a stored baseline:
+
+    python bench.py --output baseline.json
+    python bench.py --baseline baseline.json --threshold 0.1
+
+exits with status 1 if a case got slower than the baseline by more than the
+threshold. The suite also measures the cold-start import time of the entry
+modules with python -X importtime, in a fresh interpreter for every repeat;
+--imports with no module skips it. Import times are reported against the
+baseline but only fail the run with --import-threshold, as process startup
+is too noisy for the threshold of the cases.
+'''
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+from battleship import DEFAULT_CONFIG, PIECES, BattleShip, PersonalBoard
+
+
+def _fleets(seed, count, config = DEFAULT_CONFIG):
+    '''
+    Returns count random fleets of config drawn from seed.
+    '''
+    import simulate
+    rng = random.Random(seed)
+    return [simulate.random_placement(rng, config) for i in range(count)]
+
+
+def _placed(fleets, config = DEFAULT_CONFIG, engine = PersonalBoard):
+    '''
+    Returns a list of boards of the engine class, PersonalBoard by default,
+    one with every fleet of fleets.
+    '''
+    boards = []
+    for fleet in fleets:
+        board = engine(config)
+        for start, end, name in fleet:
+            board.place_piece(start, end, name)
+        boards.append(board)
+    return boards
+
+
+def case_piece(seed):
+    '''
+    Construction of every standard Piece.
+    '''
+    ends = [(cls, (0, 0), (0, cls.SIZE - 1)) for cls in PIECES.values()] * 200
+
+    def run(state):
+        for cls, start, end in ends:
+            cls(start, end)
+    return (lambda: None), run, len(ends)
+
+
+def case_place_piece(seed):
+    '''
+    PersonalBoard.place_piece of whole random fleets on empty boards.
+    '''
+    fleets = _fleets(seed, 200)
+
+    def setup():
+        return [PersonalBoard() for fleet in fleets]
+
+    def run(boards):
+        for board, fleet in zip(boards, fleets):
+            for start, end, name in fleet:
+                board.place_piece(start, end, name)
+    return setup, run, sum(len(fleet) for fleet in fleets)
+
+
+def _shots(seed, path, method = 'opponent_move', engine = PersonalBoard):
+    '''
+    Returns the case of opponent_move, or of another method of the board
+    taking the cell, on one path: 'miss' shoots every empty cell, 'hit' every
+    cell of every ship but the last, 'sunk' the last cell of every ship, after
+    the other cells have been hit outside the timed region, and 'all' every
+    cell in random order. The boards are of the engine class; the fleets and
+    the shots only depend on the seed.
+    '''
+    fleets = _fleets(seed, 50)
+    cells = []
+    before = []
+    for board in _placed(fleets):
+        ships = [piece.cells() for piece in board.pieces.values()]
+        before.append([cell for ship in ships for cell in ship[:-1]]
+                      if path == 'sunk' else [])
+        if path == 'miss':
+            taken = set(cell for ship in ships for cell in ship)
+            cells.append([(x, y) for x in range(DEFAULT_CONFIG.rows)
+                          for y in range(DEFAULT_CONFIG.cols)
+                          if (x, y) not in taken])
+        elif path == 'hit':
+            cells.append([cell for ship in ships for cell in ship[:-1]])
+        elif path == 'all':
+            shots = [(x, y) for x in range(DEFAULT_CONFIG.rows)
+                     for y in range(DEFAULT_CONFIG.cols)]
+            random.Random(seed + len(cells)).shuffle(shots)
+            cells.append(shots)
+        else:
+            cells.append([ship[-1] for ship in ships])
+
+    def setup():
+        boards = _placed(fleets, engine=engine)
+        for board, shots in zip(boards, before):
+            for cell in shots:
+                board.opponent_move(cell)
+        return boards
+
+    def run(boards):
+        for board, shots in zip(boards, cells):
+            move = getattr(board, method)
+            for cell in shots:
+                move(cell)
+    return setup, run, sum(len(shots) for shots in cells)
+
+
+def case_opponent_move_miss(seed):
+    '''
+    PersonalBoard.opponent_move on empty cells.
+    '''
+    return _shots(seed, 'miss')
+
+
+def case_opponent_move_hit(seed):
+    '''
+    PersonalBoard.opponent_move on ship cells that do not sink the ship.
+    '''
+    return _shots(seed, 'hit')
+
+
+def case_opponent_move_sunk(seed):
+    '''
+    PersonalBoard.opponent_move on the last cell of every ship.
+    '''
+    return _shots(seed, 'sunk')
+
+
+def case_attack(seed):
+    '''
+    PersonalBoard.attack, which builds a ShotResult, on every cell.
+    '''
+    return _shots(seed, 'all', 'attack')
+
+
+def case_opponent_move_all(seed):
+    '''
+    PersonalBoard.opponent_move on every cell, the same shots as attack.
+    '''
+    return _shots(seed, 'all')
+
+
+def case_bitboard_opponent_move_all(seed):
+    '''
+    BitBoard.opponent_move on the fleets and shots of opponent_move_all.
+    '''
+    from bitboard import BitBoard
+    return _shots(seed, 'all', engine=BitBoard)
+
+
+def case_bitboard_attack(seed):
+    '''
+    BitBoard.attack on the fleets and shots of attack.
+    '''
+    from bitboard import BitBoard
+    return _shots(seed, 'all', 'attack', BitBoard)
+
+
+def case_random_game(seed):
+    '''
+    Whole games between hunt/target shooters with random fleets.
+    '''
+    import simulate
+    games = 20
+
+    def run(state):
+        simulate.simulate(games, simulate.random_placement,
+                          simulate.random_placement, simulate.HuntShooter,
+                          simulate.HuntShooter, seed=seed)
+    return (lambda: None), run, games
+
+
+def case_density_shot(seed):
+    '''
+    ai.best_shot decisions on opponent views after 40 random shots.
+    '''
+    import ai
+    rng = random.Random(seed)
+    views = []
+    for board in _placed(_fleets(seed, 20)):
+        cells = [(x, y) for x in range(DEFAULT_CONFIG.rows)
+                 for y in range(DEFAULT_CONFIG.cols)]
+        rng.shuffle(cells)
+        for cell in cells[:40]:
+            board.opponent_move(cell)
+        views.append(ai.opponent_view(board.board))
+    sizes = DEFAULT_CONFIG.sizes()
+
+    def run(state):
+        for view in views:
+            ai.best_shot(view, sizes)
+    return (lambda: None), run, len(views)
+
+
+def _render(seed, opponent):
+    '''
+    Returns the case of the print function of a board after 40 shots.
+    '''
+    rng = random.Random(seed)
+    boards = _placed(_fleets(seed, 20))
+    for board in boards:
+        cells = [(x, y) for x in range(DEFAULT_CONFIG.rows)
+                 for y in range(DEFAULT_CONFIG.cols)]
+        rng.shuffle(cells)
+        for cell in cells[:40]:
+            board.opponent_move(cell)
+    game = BattleShip()
+    draw = game.print_board_opp_pov if opponent else game.print_board
+
+    def run(state):
+        with redirect_stdout(io.StringIO()):
+            for board in boards:
+                draw(board.board)
+    return (lambda: None), run, len(boards)
+
+
+def case_print_board(seed):
+    '''
+    BattleShip.print_board into a buffer.
+    '''
+    return _render(seed, False)
+
+
+def case_print_board_opp_pov(seed):
+    '''
+    BattleShip.print_board_opp_pov into a buffer.
+    '''
+    return _render(seed, True)
+
+
+def case_renderer(seed):
+    '''
+    render.BoardRenderer frames after every shot of random games.
+    '''
+    import render
+    boards = []
+    rng = random.Random(seed)
+    for board in _placed(_fleets(seed, 5)):
+        cells = [(x, y) for x in range(DEFAULT_CONFIG.rows)
+                 for y in range(DEFAULT_CONFIG.cols)]
+        rng.shuffle(cells)
+        for cell in cells:
+            board.opponent_move(cell)
+            boards.append([list(row) for row in board.board])
+
+    def run(state):
+        renderer = render.BoardRenderer(out=io.StringIO(), batch=True)
+        for board in boards:
+            renderer.draw(board)
+        renderer.flush()
+    return (lambda: None), run, len(boards)
+
+
+class _LegacyPiece(object):
+    '''
+    The Piece of the original engine, kept as the reference of
+    compare_memory: an instance dictionary with the ID number, name and
+    size, and a dictionary of the occupied cells.
+    '''
+
+    def __init__(self, start, end, size, ID, name):
+        self.ID = ID
+        self.name = name
+        self.start = start
+        self.end = end
+        self.occupied_cells = {}
+        self.hit_cells = 0
+        self.size = size
+        if start[1] == end[1]:
+            if abs(end[0] - start[0])+1 != size:
+                raise Exception('Invalid piece size.')
+            for i in range(min(start[0], end[0]), max(start[0], end[0])+1):
+                self.occupied_cells[(i, start[1])] = 0
+        elif start[0] == end[0]:
+            if abs(end[1] - start[1])+1 != size:
+                raise Exception('Invalid piece size.')
+            for i in range(min(start[1], end[1]), max(start[1], end[1])+1):
+                self.occupied_cells[(start[0], i)] = 0
+        else:
+            raise Exception('Invalid arrangement of the piece.')
+
+
+class LegacyBoard(object):
+    '''
+    The PersonalBoard of the original engine, without __slots__ and with
+    _LegacyPiece ships, kept as the reference of compare_memory. Only
+    place_piece is provided.
+    '''
+
+    def __init__(self, config = None):
+        self.config = config or DEFAULT_CONFIG
+        self.board = [[0 for x in range(self.config.cols)]
+                      for y in range(self.config.rows)]
+        self.pieces = {}
+        self.sunk_ships = 0
+
+    def place_piece(self, start, end, name):
+        ID, size = self.config.types[name]
+        ship = _LegacyPiece(start, end, size, ID, name)
+        self.pieces[name] = ship
+        for x, y in ship.occupied_cells:
+            if not self.config.in_bounds((x, y)):
+                raise Exception('Entered numbers are out of bounds.')
+            if self.board[x][y] != 0:
+                raise Exception('Illegal overlapping of ships.')
+            self.board[x][y] = ID
+
+
+def compare_memory(n = 1000, config = DEFAULT_CONFIG, seed = 0):
+    '''
+    This function runs simulate.benchmark_memory on the original boards,
+    PersonalBoard and BitBoard.
+
+    Returns: dictionary with the bytes per game of every board class
+    '''
+    import simulate
+    from bitboard import BitBoard
+    return dict((cls.__name__, simulate.benchmark_memory(n, cls, config, seed))
+                for cls in (LegacyBoard, PersonalBoard, BitBoard))
+
+
+CASES = dict((name[5:], case) for name, case in sorted(globals().items())
+             if name.startswith('case_'))
+
+#modules whose import time is measured: the engine alone, the console game,
+#the simulator the workers run, and the NumPy AI
+IMPORTS = ('engine', 'battleship', 'simulate', 'ai')
+
+
+def import_profile(module):
+    '''
+    This function imports a module in a fresh interpreter with
+    python -X importtime.
+
+    Args:
+        module: name of a module of this directory
+
+    Exceptions:
+        if the import fails
+
+    Returns: dictionary mapping the name of every module the import loaded to
+             its cumulative import time in microseconds
+    '''
+    here = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, '-X', 'importtime', '-c', 'import ' + module]
+    run = subprocess.run(command, cwd=here, stderr=subprocess.PIPE,
+                         stdout=subprocess.DEVNULL, universal_newlines=True)
+    if run.returncode != 0:
+        raise Exception('Could not import ' + module + '.')
+    profile = {}
+    for line in run.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            profile[fields[2].strip()] = int(fields[1])
+    return profile
+
+
+def import_time(module, warmup = 1, repeats = 5):
+    '''
+    This function measures the time a fresh interpreter takes to import a
+    module, as reported by python -X importtime.
+
+    Args:
+        module: name of a module of this directory
+        warmup: number of untimed imports
+        repeats: number of timed imports
+
+    Exceptions:
+        if the import fails
+
+    Returns: dictionary with the best and median cumulative import time in
+             microseconds
+    '''
+    times = []
+    for i in range(warmup + repeats):
+        profile = import_profile(module)
+        if module not in profile:
+            raise Exception(module + ' was already imported at startup.')
+        if i >= warmup:
+            times.append(profile[module])
+    times.sort()
+    return {'us': times[0], 'median_us': times[len(times) // 2]}
+
+
+def measure(case, seed = 0, warmup = 2, repeats = 7):
+    '''
+    This function times one case.
+
+    Args:
+        case: function of a seed returning (setup, run, operations): setup()
+              builds the state of a round outside the timed region, run(state)
+              performs operations operations
+        seed: seed of the case
+        warmup: number of untimed rounds
+        repeats: number of timed rounds
+
+    Returns: dictionary with the best and median nanoseconds per operation and
+             the operations per second of the best round
+    '''
+    setup, run, operations = case(seed)
+    for i in range(warmup):
+        run(setup())
+    times = []
+    for i in range(repeats):
+        state = setup()
+        begin = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - begin)
+    times.sort()
+    best = times[0] / operations
+    return {'ns_per_op': 1e9 * best,
+            'median_ns_per_op': 1e9 * times[len(times) // 2] / operations,
+            'ops_per_sec': 1.0 / best,
+            'operations': operations}
+
+
+def run_suite(names = None, seed = 0, warmup = 2, repeats = 7,
+              imports = IMPORTS):
+    '''
+    This function measures the cases of names, all of them by default, and
+    the import time of the modules of imports.
+
+    Exceptions:
+        if a name is not a case
+
+    Returns: dictionary with the settings and platform under 'meta', the
+             measures of every case under 'results' and the import times
+             under 'imports'
+    '''
+    names = names or sorted(CASES)
+    for name in names:
+        if name not in CASES:
+            raise Exception('Unknown benchmark case: ' + name + '.')
+    return {'meta': {'seed': seed, 'warmup': warmup, 'repeats': repeats,
+                     'python': platform.python_version(),
+                     'implementation': platform.python_implementation(),
+                     'machine': platform.machine()},
+            'results': dict((name, measure(CASES[name], seed, warmup, repeats))
+                            for name in names),
+            'imports': dict((module, import_time(module))
+                            for module in imports)}
+
+
+def compare(current, baseline, threshold = 0.1, import_threshold = None):
+    '''
+    This function compares the cases of two runs of run_suite.
+
+    Args:
+        current, baseline: dictionaries returned by run_suite
+        threshold: largest accepted slowdown, as a fraction of the baseline
+        import_threshold: largest accepted slowdown of the import times;
+                          None to report them without flagging regressions,
+                          since process startup is much noisier than the
+                          cases
+
+    Returns: list of tuples (name, baseline time, current time, relative
+             change, regressed) for the cases of both runs, in ns/op, and for
+             the modules imported in both, in microseconds under the name
+             'import ' + module
+    '''
+    rows = []
+    for name in sorted(current['results']):
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['ns_per_op']
+        after = current['results'][name]['ns_per_op']
+        change = after / before - 1.0
+        rows.append((name, before, after, change, change > threshold))
+    for module in sorted(current.get('imports', {})):
+        if module not in baseline.get('imports', {}):
+            continue
+        before = baseline['imports'][module]['us']
+        after = current['imports'][module]['us']
+        change = after / before - 1.0
+        rows.append(('import ' + module, before, after, change,
+                     import_threshold is not None and
+                     change > import_threshold))
+    return rows
+
+
+def main(argv = None):
+    '''
+    Runs the suite from the command line, prints the results as JSON and
+    returns the exit status: 1 if a case regressed against the baseline.
+    '''
+    parser = argparse.ArgumentParser(description='Battleship benchmarks.')
+    parser.add_argument('cases', nargs='*', help='cases to run, all by default')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--output', help='file to write the results to')
+    parser.add_argument('--baseline', help='results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='largest accepted slowdown, 0.1 is 10%%')
+    parser.add_argument('--imports', nargs='*', default=IMPORTS,
+                        help='modules whose import time is measured')
+    parser.add_argument('--import-threshold', type=float,
+                        help='largest accepted slowdown of the import times, '
+                             'which are not checked by default')
+    args = parser.parse_args(argv)
+    results = run_suite(args.cases, args.seed, args.warmup, args.repeats,
+                        args.imports)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    status = 0
+    for name, before, after, change, regressed in compare(
+            results, baseline, args.threshold, args.import_threshold):
+        unit = 'us   ' if name.startswith('import ') else 'ns/op'
+        print('%-24s %12.0f %12.0f %s %+7.1f%%%s' %
+              (name, before, after, unit, 100 * change,
+               '  REGRESSION' if regressed else ''), file=sys.stderr)
+        if regressed:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
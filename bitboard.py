@@ -0,0 +1,336 @@
+'''
+An alternative board engine for headless simulation. BitBoard has the same
+place_piece / opponent_move / game_over API as PersonalBoard but keeps the
+state of the game as integer bitmasks instead of a matrix of mixed values.
+
+A shot costs about the same on both engines (see the opponent_move_all and
+bitboard_opponent_move_all cases of bench.py): what BitBoard buys is the
+state, not the shot. A board is a handful of ints and two short lists rather
+than Piece objects and a matrix, so it takes a fraction of the memory
+(simulate.benchmark_memory), snapshot and restore copy five values whatever
+was played (replay keeps checkpoints of both boards), and the ship masks
+are the placement masks of placements.py.
+'''
+
+from array import array
+
+from engine import DEFAULT_CONFIG, HIT, MISS, SUNK, PersonalBoard
+from placements import placement_index
+
+#single-bit masks of the cells of a board, keyed by number of cells, so that
+#attacks don't shift ints
+_BITS = {}
+
+
+def cell_bits(cells):
+    '''
+    This function returns the list of the single-bit masks of a board with the
+    given number of cells, building it on the first call.
+
+    Returns: list of ints
+    '''
+    bits = _BITS.get(cells)
+    if bits is None:
+        bits = _BITS[cells] = [1 << i for i in range(cells)]
+    return bits
+
+
+def cell_bit(cell, cols = 10):
+    '''
+    This function returns the bitmask with the single bit of a board cell set.
+    Cell (x, y) is stored at bit x*cols + y.
+
+    Args:
+        cell: tuple with board coordinates
+        cols: number of columns of the board
+
+    Returns: int
+    '''
+    return 1 << (cell[0]*cols + cell[1])
+
+
+def ship_cells(start, end, size, cols = 10):
+    '''
+    This function returns the indices (x*cols + y) of all the cells covered by
+    a ship going from start to end (inclusive). It performs the same checks,
+    with the same messages, as the Piece constructor.
+
+    Args:
+        start: tuple with board coordinates
+        end: tuple with board coordinates
+        size: the size of the ship
+        cols: number of columns of the board
+
+    Exceptions:
+        if the start and end coordinates do not form the correct piece size;
+        if the start and end coordinates are not on the same horizontal\\vertical line
+
+    Returns: list of ints
+    '''
+    start_x, start_y = start
+    end_x, end_y = end
+    #vertical orientation: one cell per row
+    if start_y == end_y:
+        if abs(end_x - start_x)+1 != size:
+            raise Exception('Invalid piece size.')
+        first = min(start_x, end_x)*cols + start_y
+        return list(range(first, first + size*cols, cols))
+    #horizontal orientation: consecutive cells
+    elif start_x == end_x:
+        if abs(end_y - start_y)+1 != size:
+            raise Exception('Invalid piece size.')
+        first = start_x*cols + min(start_y, end_y)
+        return list(range(first, first + size))
+    raise Exception('Invalid arrangement of the piece.')
+
+
+def ship_mask(start, end, size, cols = 10):
+    '''
+    This function returns the bitmask of all the cells covered by a ship going
+    from start to end (inclusive), see ship_cells.
+
+    Returns: int
+    '''
+    mask = 0
+    for i in ship_cells(start, end, size, cols):
+        mask |= 1 << i
+    return mask
+
+
+class BitBoard(object):
+    '''
+    BitBoard represents a player's game board with integer bitmasks: one
+    mask per ship, plus masks of the cells that have been shot at, hit, and
+    sunk. An array maps every cell to the ID number of the ship on it, so an
+    attack costs a couple of integer operations and no Piece objects are
+    created.
+    '''
+
+    def __init__(self, config = None):
+        '''
+        Initialize a BitBoard object with the following instance variables:
+            self.config: the GameConfig of the game, DEFAULT_CONFIG if not given
+            self.rows, self.cols: dimensions of the board
+            self.bits: single-bit masks of the cells (see cell_bits)
+            self.ids: array with the ID number of the ship on each cell (0 if
+                      the cell is empty), of bytes unless the fleet has more
+                      than 255 ships
+            self.masks: list indexed by ship ID with the bitmask of each ship
+            self.afloat: list indexed by ship ID with the number of cells of
+                       each ship that have not been hit
+            self.pieces: dictionary where keys are piece names and values are the
+                         corresponding ship bitmasks
+            self.fleet: bitmask of all the cells occupied by ships
+            self.shots: bitmask of all the cells that have been attacked
+            self.hits: bitmask of all the attacked cells that contain a ship
+            self.sunk: bitmask of all the cells of sunk ships
+            self.sunk_ships: number of ships sunk on the board
+            self.listeners: dictionary where keys are events and values are
+                            the callbacks subscribed to them, None until the
+                            first subscription (see PersonalBoard.subscribe)
+        '''
+        self.config = config or DEFAULT_CONFIG
+        self.rows = self.config.rows
+        self.cols = self.config.cols
+        self.bits = cell_bits(self.rows * self.cols)
+        ships = len(self.config.fleet)
+        typecode = 'B' if ships < 1 << 8 else 'H' if ships < 1 << 16 else 'L'
+        self.ids = array(typecode, [0]) * (self.rows * self.cols)
+        self.masks = [0] * (len(self.config.fleet)+1)
+        self.afloat = [0] * (len(self.config.fleet)+1)
+        self.pieces = {}
+        self.fleet = 0
+        self.shots = 0
+        self.hits = 0
+        self.sunk = 0
+        self.sunk_ships = 0
+        self.listeners = None
+
+
+    def place_piece(self, start, end, name):
+        '''
+        This function places the ship given by name on the board by storing its
+        bitmask and writing its ID number into the cells it occupies. Nothing is
+        changed on the board if the placement is illegal.
+
+        Args:
+            start: tuple with board coordinates
+            end: tuple with board coordinates
+            name: the name of the Piece
+
+        Exceptions:
+            if the name is not a ship of the fleet of the GameConfig
+            if the start and end coordinates do not form a legal piece
+            if any of the cells that the Piece occupies is out of bounds
+            if any of the cells that the Piece occupies overlaps with another Piece
+        '''
+        if name not in self.config.types:
+            raise Exception('Unknown type of ship.')
+        ID, size = self.config.types[name]
+        index = placement_index(size, self.rows, self.cols)
+        number = index.find(start, end)
+        if number is None:
+            #not a legal placement: raise the same exception as PersonalBoard
+            ship_cells(start, end, size, self.cols)
+            raise Exception('Entered numbers are out of bounds.')
+        cells = index.cells[number]
+        mask = index.masks[number]
+        if self.fleet & mask:
+            raise Exception('Illegal overlapping of ships.')
+
+        self.pieces[name] = mask
+        self.masks[ID] = mask
+        self.afloat[ID] = size
+        self.fleet |= mask
+        for i in cells:
+            self.ids[i] = ID
+
+
+    def opponent_move(self, cell, ships = None):
+        '''
+        This method generates a response after the opponent has attacked a
+        specified cell on the BitBoard, following the same rules as
+        PersonalBoard.opponent_move: 'miss' if the cell is empty, 'hit' if it
+        contains a ship that is still afloat, and 'sunk: ' + (name of the ship)
+        if the attack sank the ship. The callbacks subscribed to the outcome
+        are called like those of PersonalBoard.
+
+        Args:
+            cell: tuple with board coordinates
+            ships: list of names of the Pieces on the board, by default the
+                   ships of the GameConfig
+
+        Exceptions:
+            if the cell being attacked is out of bounds
+            if the cell being attacked has been attacked before
+
+        Returns: string
+        '''
+        x = cell[0]
+        y = cell[1]
+        cols = self.cols
+        #attacked cell is out of bounds
+        if x < 0 or x >= self.rows or y < 0 or y >= cols:
+            raise Exception('Entered numbers are out of bounds.')
+
+        index = x*cols + y
+        bit = self.bits[index]
+        shots = self.shots
+        #attacked cell already attacked
+        if shots & bit:
+            raise Exception('Already attacked that square.')
+        self.shots = shots | bit
+
+        ID = self.ids[index]
+        #miss
+        if not ID:
+            if self.listeners:
+                self._notify(cell, MISS, 0)
+            return MISS
+        #hit or sunk
+        self.hits |= bit
+        afloat = self.afloat
+        left = afloat[ID] - 1
+        afloat[ID] = left
+        if left:
+            if self.listeners:
+                self._notify(cell, HIT, ID)
+            return HIT
+        self.sunk |= self.masks[ID]
+        self.sunk_ships += 1
+        if self.listeners:
+            self._notify(cell, SUNK, ID)
+        return 'sunk: ' + (ships or self.config.ships)[ID]
+
+
+    def attack(self, cell):
+        '''
+        This method attacks a cell like opponent_move and returns the same
+        ShotResult as PersonalBoard.attack.
+
+        Args:
+            cell: tuple with board coordinates
+
+        Exceptions:
+            if the cell being attacked is out of bounds
+            if the cell being attacked has been attacked before
+
+        Returns: ShotResult
+        '''
+        x = cell[0]
+        y = cell[1]
+        ID = 0
+        #opponent_move raises the exception of a cell out of bounds
+        if 0 <= x < self.rows and 0 <= y < self.cols:
+            ID = self.ids[x*self.cols + y]
+        outcome = self.opponent_move(cell)
+        return self._result(cell, HIT if outcome == HIT else SUNK, ID)
+
+
+    #the events of PersonalBoard, which only use the GameConfig, the pieces
+    #and the number of sunk ships
+    subscribe = PersonalBoard.subscribe
+    unsubscribe = PersonalBoard.unsubscribe
+    _result = PersonalBoard._result
+    _notify = PersonalBoard._notify
+
+
+    def game_over(self):
+        '''
+        This method checks if the game is over by comparing the number of
+        sunk ships with the number of pieces placed on the board.
+
+        Returns: boolean
+        '''
+        return self.sunk_ships == len(self.pieces)
+
+
+    def snapshot(self):
+        '''
+        This method returns the state of the attacks on the board: the shot,
+        hit and sunk masks, the number of sunk ships and the cells of each ship
+        still afloat. The ships themselves never change once placed, so this is
+        all restore needs.
+
+        Returns: tuple
+        '''
+        return (self.shots, self.hits, self.sunk, self.sunk_ships,
+                tuple(self.afloat))
+
+
+    def restore(self, snapshot):
+        '''
+        This method puts the board back in the state returned by snapshot.
+
+        Args:
+            snapshot: value returned by snapshot
+        '''
+        self.shots, self.hits, self.sunk, self.sunk_ships, afloat = snapshot
+        self.afloat[:] = afloat
+
+
+    @property
+    def board(self):
+        '''
+        The board as the same matrix PersonalBoard keeps, with ship ID
+        numbers and the 'M', 'H' and 'S' marks, so it can be passed to
+        BattleShip.print_board and BattleShip.print_board_opp_pov. The matrix is
+        rebuilt on every access.
+
+        Returns: list of lists
+        '''
+        board = [[0 for x in range(self.cols)] for y in range(self.rows)]
+        for i in range(self.rows):
+            row = board[i]
+            for j in range(self.cols):
+                index = i*self.cols + j
+                bit = self.bits[index]
+                if self.sunk & bit:
+                    row[j] = 'S'
+                elif self.hits & bit:
+                    row[j] = 'H'
+                elif self.shots & bit:
+                    row[j] = 'M'
+                else:
+                    row[j] = self.ids[index]
+        return board
@@ -0,0 +1,652 @@
+'''
+Game engine: the Piece hierarchy, GameConfig and PersonalBoard, with nothing
+but the standard library behind them. Simulations and tournament workers
+import this module rather than battleship, which adds the console game on top
+of it, so that starting a process does not load code it never runs; the
+server also takes the engine from here and only the BattleShip class, which
+holds the boards of its sessions, from battleship. The NumPy parts (ai,
+vector, opening, validate) and the tables of the placement index are only
+loaded by the code that uses them.
+'''
+
+from collections import namedtuple
+from types import MappingProxyType
+
+class Piece(object):  
+    '''
+    Piece is the parent class of all the unique types of ships in the game and 
+    keeps track of its start and end points on a matrix, the cells that it
+    occupies on a matrix, which of its occupied cells have been hit, and its
+    size.
+    
+    The ID number, name and default size (SIZE) of a type of ship are class
+    constants, and instances only have the slots below, so a Piece takes a
+    fixed handful of bytes whatever its size.
+    '''
+    
+    __slots__ = ('start', 'end', 'size', 'top', 'left', 'vertical', 'hits')
+    
+    ID = 0
+    name = ''
+    SIZE = 0
+    
+    def __init__(self, start, end, size = None):
+        '''
+        Initializes a Piece object with the following instance variables:
+            self.start: tuple with board coordinates 
+            self.end: tuple with board coordinates 
+            self.size: the size of the ship
+            self.top: row of the topmost cell of the Piece
+            self.left: column of the leftmost cell of the Piece
+            self.vertical: True if the Piece goes from top to bottom
+            self.hits: bitmask where bit i is set when the i-th cell of the
+                       Piece, counting from the top-left end, has been hit
+        Args: 
+            start: tuple with board coordinates 
+            end: tuple with board coordinates
+            size: the size of the ship, by default the SIZE of the class
+                        
+        Exceptions: 
+            if the start and end coordinates do not form the correct piece size;
+            if the start and end coordinates are not on the same horizontal\vertical line
+        '''
+        self.start = start 
+        self.end = end
+        self.size = self.SIZE if size is None else size
+        self.hits = 0 
+        
+        start_x = start[0]
+        start_y = start[1]
+        end_x = end[0]
+        end_y = end[1]
+        
+        #vertical orientation
+        if start_y == end_y:
+            #wrong sizing
+            if abs(end_x - start_x)+1 != self.size:
+                raise Exception('Invalid piece size.')
+            self.vertical = True
+        #horizonal orientation
+        elif start_x == end_x:
+            #wrong sizing
+            if abs(end_y - start_y)+1 != self.size:
+                raise Exception('Invalid piece size.')
+            self.vertical = False
+        #attempted diagonal orientation
+        else: 
+            raise Exception('Invalid arrangement of the piece.') 
+        self.top = min(start_x, end_x)
+        self.left = min(start_y, end_y)
+
+
+    def cells(self):
+        '''
+        This method returns the board cells that the piece occupies, from the
+        topmost or leftmost one to the bottommost or rightmost one.
+        
+        Returns: list of tuples of board coordinates
+        '''
+        if self.vertical:
+            return [(self.top + i, self.left) for i in range(self.size)]
+        return [(self.top, self.left + i) for i in range(self.size)]
+    
+    @property
+    def occupied_cells(self):
+        '''
+        Read-only mapping where the keys are tuples that represent all board
+        cells the Piece occupies & values are 0, or 'H' if the cell has been
+        hit. It is built from self.hits on every access, so it cannot be
+        written to: cells are hit with hit().
+        '''
+        return MappingProxyType(dict((cell, 'H' if self.hits >> i & 1 else 0) 
+                                     for i, cell in enumerate(self.cells())))
+    
+    @property
+    def hit_cells(self):
+        '''
+        Number of cells hit by the opponent.
+        '''
+        return bin(self.hits).count('1')
+
+
+    def hit(self, cell):
+        '''
+        This method indicates that the cell has been hit by setting its bit in
+        self.hits. Since the cells of the piece are in a line, the position of
+        the cell in the piece is its distance from the top-left end.
+        
+        Args:
+            cell: tuple of board coordinates
+        
+        Preconditions: 
+            the cell that the opponent has fired at is a hit
+        
+        '''
+        self.hits |= 1 << (cell[0] - self.top + cell[1] - self.left)
+    
+    def unhit(self, cell):
+        '''
+        This method undoes hit(cell) by clearing the bit of the cell in self.hits.
+        
+        Args:
+            cell: tuple of board coordinates
+        '''
+        self.hits &= ~(1 << (cell[0] - self.top + cell[1] - self.left))
+    
+    def is_sunk(self):
+        '''
+        This method returns true if all cells that the piece occupies have been hit; 
+        otherwise, return false. 
+        
+        Returns: boolean
+        '''
+        return self.hits == (1 << self.size) - 1
+
+
+class Carrier(Piece):
+    '''
+    subclass of Piece
+    
+    size specification: 5
+    
+    class constants:
+        ID number: 5
+        name: carrier
+    '''    
+    
+    __slots__ = ()
+    
+    ID = 5
+    name = 'carrier'
+    SIZE = 5
+    
+
+class Battleship(Piece):
+    '''
+    subclass of Piece
+    
+    size specification: 4
+    
+    class constants:
+        ID number: 4
+        name: battleship
+    '''   
+    
+    __slots__ = ()
+    
+    ID = 4
+    name = 'battleship'
+    SIZE = 4
+
+       
+class Submarine(Piece):
+    '''
+    subclass of Piece
+    
+    size specification: 3
+    
+    class constants:
+        ID number: 3
+        name: submarine
+    '''   
+    
+    __slots__ = ()
+    
+    ID = 3
+    name = 'submarine'
+    SIZE = 3
+
+   
+class Cruiser(Piece):
+    '''
+    subclass of Piece
+    
+    size specification: 2
+    
+    class constants:
+        ID number: 2
+        name: 'cruiser'
+    '''     
+    
+    __slots__ = ()
+    
+    ID = 2
+    name = 'cruiser'
+    SIZE = 2
+
+            
+class Destroyer(Piece):
+    '''
+    subclass of Piece
+    
+    size specification: 2
+    
+    class constants:
+        ID number: 1
+        name: 'destroyer'
+    '''    
+    
+    __slots__ = ()
+    
+    ID = 1
+    name = 'destroyer'
+    SIZE = 2
+
+
+#Piece subclass of each of the standard types of ships
+PIECES = {'destroyer': Destroyer,
+          'cruiser': Cruiser,
+          'submarine': Submarine,
+          'battleship': Battleship,
+          'carrier': Carrier}
+
+#Piece subclasses created for the ships of custom fleets, keyed by
+#(name, ID number, size)
+_PIECE_CLASSES = {}
+
+
+def piece_class(name, ID, size):
+    '''
+    This function returns the Piece subclass for a ship with the given name,
+    ID number and size: the standard subclass if it matches, otherwise a
+    subclass created on the first call.
+    
+    Returns: subclass of Piece
+    '''
+    cls = PIECES.get(name)
+    if cls is not None and cls.ID == ID and cls.SIZE == size:
+        return cls
+    key = (name, ID, size)
+    if key not in _PIECE_CLASSES:
+        _PIECE_CLASSES[key] = type(str(name.capitalize()), (Piece,), 
+                                   {'__slots__': (), 'ID': ID, 'name': name, 
+                                    'SIZE': size})
+    return _PIECE_CLASSES[key]
+
+
+class GameConfig(object):
+    '''
+    GameConfig describes the game being played: the dimensions of the board and
+    the fleet each player places on it. The fleet is a list of (name, size)
+    tuples and the ID number of each ship is its position in the list,
+    starting from 1.
+    '''
+    
+    def __init__(self, rows = 10, cols = 10, fleet = None):
+        '''
+        Initializes a GameConfig object with the following instance variables:
+            self.rows: number of rows of the board
+            self.cols: number of columns of the board
+            self.fleet: list of (name, size) tuples, by default the five
+                        standard ships
+            self.ships: list of names of the Pieces indexed by ID number, as
+                        passed to PersonalBoard.opponent_move
+            self.types: dictionary where keys are ship names and values are
+                        (ID number, size) tuples
+        
+        Exceptions:
+            if the board has no cells
+            if two ships have the same name
+            if a ship does not fit on the board
+        '''
+        if fleet is None:
+            fleet = [('destroyer', 2), ('cruiser', 2), ('submarine', 3),
+                     ('battleship', 4), ('carrier', 5)]
+        if rows < 1 or cols < 1:
+            raise Exception('Invalid board dimensions.')
+        self.rows = rows
+        self.cols = cols
+        self.fleet = list(fleet)
+        self.ships = [''] + [name for name, size in self.fleet]
+        self.types = {}
+        for ID, (name, size) in enumerate(self.fleet, 1):
+            if name in self.types:
+                raise Exception('Duplicate ship name: ' + name + '.')
+            if size < 1 or size > max(rows, cols):
+                raise Exception('Invalid piece size.')
+            self.types[name] = (ID, size)
+    
+    def sizes(self):
+        '''
+        Returns the list of the sizes of the ships in ID order.
+        '''
+        return [size for name, size in self.fleet]
+
+    def in_bounds(self, cell):
+        '''
+        Returns True if cell is on the board.
+        '''
+        return 0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols
+
+
+#the standard game: a 10X10 board and the five standard ships
+DEFAULT_CONFIG = GameConfig()
+
+
+#outcomes of an attack
+MISS = 'miss'
+HIT = 'hit'
+SUNK = 'sunk'
+
+
+class ShotResult(namedtuple('ShotResult', ['outcome', 'cell', 'ID', 'name', 
+                                           'remaining'])):
+    '''
+    ShotResult is the result of an attack on a PersonalBoard:
+        outcome: MISS, HIT or SUNK
+        cell: tuple with the board coordinates of the attack
+        ID: ID number of the ship hit, 0 on a miss
+        name: name of the ship hit, '' on a miss
+        remaining: number of ships of the board that have not been sunk
+    str() gives the string returned by opponent_move.
+    '''
+    
+    __slots__ = ()
+    
+    def __str__(self):
+        if self.outcome == SUNK:
+            return 'sunk: ' + self.name
+        return self.outcome
+
+
+#builds a ShotResult from a tuple without the argument handling of its __new__
+_new_result = tuple.__new__
+
+
+class PersonalBoard(object):
+    '''
+    PersonalBoard represents each player's game board as a matrix (10X10 unless
+    another GameConfig is given) and keeps
+    track of all the pieces in the game, where the pieces are in the board, what
+    board cells have been attacked (denoted by 'M' for miss, 'H' for hit, and 
+    'S' for sunk), and number of ships that have been sunk. 
+    ''' 
+    
+    __slots__ = ('config', 'board', 'pieces', 'sunk_ships', 'history', 
+                 'listeners')
+    
+    def __init__(self, config = None):
+        '''    
+        Initialize a PersonalBoard object with the following instance variables:
+            self.config: the GameConfig of the game, DEFAULT_CONFIG if not given
+            self.board: rows x cols matrix with default values set to 0
+            self.pieces: dictionary where keys are piece names and values are the
+                         corresponding Piece objects on the board
+            self.sunk_ships: number of ships sunk on the board
+            self.history: list of the undo records of the moves made with 
+                          make_move, most recent last
+            self.listeners: dictionary where keys are events and values are
+                            the callbacks subscribed to them, None until the
+                            first subscription
+        '''
+        self.config = config or DEFAULT_CONFIG
+        self.board = [[0 for x in range(self.config.cols)] 
+                      for y in range(self.config.rows)]
+        self.pieces = {}
+        self.sunk_ships = 0
+        self.history = []
+        self.listeners = None
+    
+
+    def place_piece(self, start, end, name):
+        ''' 
+        This function adds a Piece (as specified by the name parameter)
+        to self.pieces where the key is the name of the ship and the value is the 
+        Piece, and places the Piece on the PersonalBoard by filling the cells the
+        Piece occupies of self.board with the ID number of the Piece. 
+        
+        Args:
+            start: tuple with board coordinates
+            end: tuple with board coordinates
+            name: the name of the Piece
+        
+        Exceptions:
+            if the name is not a ship of the fleet of the GameConfig
+            if any of the cells that the Piece occupies is out of bounds
+            if any of the cells that the Piece occupies overlaps with another Piece
+        '''
+        if name not in self.config.types:
+            raise Exception('Unknown type of ship.')
+        ID, size = self.config.types[name]
+        ship = piece_class(name, ID, size)(start, end)
+        cells = ship.cells()
+
+        #throw exceptions for illegal placements before changing the board; the
+        #cells are in a line, so checking both ends is enough for the bounds
+        if not self.config.in_bounds(start) or not self.config.in_bounds(end):
+            raise Exception('Entered numbers are out of bounds.')
+        for x, y in cells:
+            if self.board[x][y] != 0:
+                raise Exception('Illegal overlapping of ships.')
+        #store into instance variable and place the ship on the board
+        self.pieces[name] = ship
+        for x, y in cells:
+            self.board[x][y] = ID
+    
+
+    def attack(self, cell):
+        '''
+        This method attacks a cell like opponent_move and returns the outcome
+        as a ShotResult, with the ID number and name of the ship hit and the
+        number of ships left afloat.
+     
+        Args:
+            cell: tuple with board coordinates
+           
+        Exceptions:
+            if the cell being attacked is out of bounds
+            if the cell being attacked has been attacked before
+            
+        Returns: ShotResult
+        '''
+        x = cell[0]
+        y = cell[1]
+        ID = 0
+        #opponent_move raises the exception of a cell out of bounds
+        if 0 <= x < self.config.rows and 0 <= y < self.config.cols:
+            ID = self.board[x][y]
+        outcome = self.opponent_move(cell)
+        return self._result(cell, HIT if outcome == HIT else SUNK, ID)
+    
+
+    def opponent_move(self, cell, ships = None):
+        '''
+        This method generates a response after the opponent has attacked a 
+        specificed cell on the PersonalBoard. If the board cell has value 0 it 
+        means that there is no ship on that board cell, so 'miss' is returned and
+        the board cell is marked with a 'M'. If the board cell has a 'S', 'M', or
+        'H', an exception is raised since that board cell has already been 
+        attacked before. Otherwise, the board cell contains a nonzero number that
+        is the ID of a Piece on the PersonalBoard, so the ship with that ID has been
+        hit. This method then checks to see if that hit has caused the ship to sink,
+        in which case all of the occupied cells of the ship are marked with S,
+        the number of sunk ships increments by 1, and 'sunk: ' + (name of the
+        ship) is returned. Otherwise, the ship doesn't sink, the board cell is
+        marked with a 'H' and 'hit' is returned. 
+        
+        The callbacks subscribed to the outcome are called with the ShotResult
+        of the attack, and those subscribed to 'game_over' too if the last ship
+        has sunk. The ShotResult is only built when a callback is subscribed.
+     
+        Args:
+            cell: tuple with board coordinates
+            ships: list of names of the Pieces on the board, by default the
+                   ships of the GameConfig
+           
+        Exceptions:
+            if the cell being attacked is out of bounds
+            if the cell being attacked has been attacked before
+            
+        Returns: string
+        '''
+        x = cell[0]
+        y = cell[1]
+        #attacked cell is out of bounds
+        if x < 0 or x >= self.config.rows or y < 0 or y >= self.config.cols:
+            raise Exception('Entered numbers are out of bounds.')
+        
+        ID = self.board[x][y]
+        #miss
+        if ID == 0:
+            self.board[x][y] = 'M'
+            if self.listeners:
+                self._notify(cell, MISS, 0)
+            return MISS
+        #attacked cell already attacked
+        elif ID == 'S'or ID == 'M' or ID == 'H':
+            raise Exception('Already attacked that square.')
+        #hit or sunk
+        ship = self.pieces[self.config.ships[ID]]
+        ship.hit(cell)
+        #check if the ship is sunk
+        if ship.is_sunk():
+            self.sunk_ships += 1                
+            for i, j in ship.cells():
+                self.board[i][j] = 'S'
+            if self.listeners:
+                self._notify(cell, SUNK, ID)
+            return 'sunk: ' + (ships or self.config.ships)[ID]
+        #otherwise, ship has been hit and not sunk
+        self.board[x][y] = 'H'
+        if self.listeners:
+            self._notify(cell, HIT, ID)
+        return HIT
+    
+
+    def _result(self, cell, outcome, ID):
+        '''
+        Returns the ShotResult of the attack on cell, made after the attack:
+        MISS if ID is 0, otherwise outcome on the ship with that ID number.
+        '''
+        remaining = len(self.pieces) - self.sunk_ships
+        if ID == 0:
+            return _new_result(ShotResult, (MISS, cell, 0, '', remaining))
+        return _new_result(ShotResult, (outcome, cell, ID, self.config.ships[ID],
+                                        remaining))
+    
+
+    def _notify(self, cell, outcome, ID):
+        '''
+        Calls the callbacks subscribed to the outcome of the attack on cell,
+        and those subscribed to 'game_over' if it sank the last ship.
+        '''
+        result = self._result(cell, outcome, ID)
+        for callback in self.listeners.get(outcome, ()):
+            callback(result)
+        if outcome == SUNK and result.remaining == 0:
+            for callback in self.listeners.get('game_over', ()):
+                callback(result)
+    
+
+    def subscribe(self, event, callback):
+        '''
+        This method registers a callback to be called with the ShotResult of
+        every attack with the given outcome.
+        
+        Args:
+            event: MISS, HIT, SUNK, or 'game_over' for the attack that sinks
+                   the last ship
+            callback: function taking a ShotResult
+        
+        Exceptions:
+            if the event is unknown
+        '''
+        if event not in (MISS, HIT, SUNK, 'game_over'):
+            raise Exception('Unknown event.')
+        if self.listeners is None:
+            self.listeners = {}
+        self.listeners.setdefault(event, []).append(callback)
+    
+
+    def unsubscribe(self, event, callback):
+        '''
+        This method removes a callback registered with subscribe. Nothing
+        happens if the callback is not subscribed to the event.
+        '''
+        callbacks = (self.listeners or {}).get(event, ())
+        if callback in callbacks:
+            callbacks.remove(callback)
+    
+
+    def game_over(self):
+        '''
+        This method checks if the game is over by comparing the number of
+        sunk ships with the number of pieces initially placed on the board.
+        
+        Returns: boolean
+        '''
+        if self.sunk_ships == len(self.pieces):
+            return True
+        return False
+    
+
+    def make_move(self, cell, ships = None):
+        '''
+        This method attacks a cell like opponent_move and records how to undo
+        the attack: the cell, its previous value in self.board, and the ship
+        if the attack sank it. Nothing else is copied, so search code can
+        explore moves with make_move and go back with unmake_move.
+        
+        Args:
+            cell: tuple with board coordinates
+            ships: list of names of the Pieces on the board, by default the
+                   ships of the GameConfig
+        
+        Exceptions:
+            the same as opponent_move; nothing is recorded when one is raised
+        
+        Returns: string
+        '''
+        x = cell[0]
+        y = cell[1]
+        previous = self.board[x][y] if self.config.in_bounds(cell) else None
+        result = self.opponent_move(cell, ships)
+        sunk = None
+        if result != MISS and result != HIT:
+            sunk = self.pieces[self.config.ships[previous]]
+        self.history.append((x, y, previous, sunk))
+        return result
+    
+
+    def unmake_move(self):
+        '''
+        This method undoes the last move made with make_move, restoring the
+        attacked cell, the hit cells of the ship and the number of sunk ships.
+        
+        Exceptions:
+            if there is no move to undo
+        '''
+        if not self.history:
+            raise Exception('No move to undo.')
+        x, y, previous, sunk = self.history.pop()
+        if previous != 0:
+            ship = sunk or self.pieces[self.config.ships[previous]]
+            ship.unhit((x, y))
+            if sunk is not None:
+                #the other cells of the ship were hit before it sank
+                self.sunk_ships -= 1
+                for i, j in sunk.cells():
+                    self.board[i][j] = 'H'
+        self.board[x][y] = previous
+    
+
+    def snapshot(self):
+        '''
+        This method returns a marker of the current state of the board, to be
+        passed to restore. Only moves made with make_move can be restored.
+        
+        Returns: int
+        '''
+        return len(self.history)
+    
+
+    def restore(self, marker):
+        '''
+        This method undoes the moves made with make_move since snapshot
+        returned marker.
+        
+        Args:
+            marker: value returned by snapshot
+        '''
+        while len(self.history) > marker:
+            self.unmake_move()
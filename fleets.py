@@ -0,0 +1,163 @@
+'''
+Random fleet generation for simulations. Ships are placed one at a time, each
+one drawn uniformly among the placements that do not overlap the ships already
+placed, so a fleet never has to be thrown away and no exceptions are involved.
+'''
+
+import random
+import time
+
+from engine import DEFAULT_CONFIG
+from placements import placement_index
+
+
+def fleet_numbers(rng, sizes, rows = 10, cols = 10):
+    '''
+    This function draws a random fleet and returns, for every ship size given,
+    the number of its placement in the PlacementIndex of that size.
+
+    Args:
+        rng: random.Random instance
+        sizes: sizes of the ships to place
+        rows, cols: dimensions of the board
+
+    Exceptions:
+        if there is no room left for one of the ships
+
+    Returns: list of ints
+    '''
+    occupied = []
+    numbers = []
+    for size in sizes:
+        index = placement_index(size, rows, cols)
+        #placements overlapping the ships placed so far, via the reverse index
+        blocked = set()
+        for cell in occupied:
+            blocked.update(index.covering[cell])
+        free = len(index.masks) - len(blocked)
+        if free <= 0:
+            raise Exception('No room left for a ship of size ' + str(size) + '.')
+        #pick the number-th free placement, skipping over the blocked ones
+        number = int(rng.random() * free)
+        for skip in sorted(blocked):
+            if skip > number:
+                break
+            number += 1
+        occupied.extend(index.cells[number])
+        numbers.append(number)
+    return numbers
+
+
+def random_fleet(rng, config):
+    '''
+    This placement strategy (see simulate.py) returns a random fleet of
+    non-overlapping ships.
+
+    Args:
+        rng: random.Random instance
+        config: the GameConfig of the game
+
+    Returns: list of (start, end, name) tuples
+    '''
+    rows, cols = config.rows, config.cols
+    fleet = []
+    numbers = fleet_numbers(rng, config.sizes(), rows, cols)
+    for (name, size), number in zip(config.fleet, numbers):
+        start, end = placement_index(size, rows, cols).ends[number]
+        fleet.append((start, end, name))
+    return fleet
+
+
+def _mask_words(index, words):
+    '''
+    Returns the bitmasks of all the placements of a PlacementIndex split into
+    64-bit words, as a uint64 array of shape (placements, words).
+    '''
+    import numpy as np
+    low = (1 << 64) - 1
+    return np.array([[(mask >> (64*w)) & low for w in range(words)]
+                     for mask in index.masks], dtype=np.uint64)
+
+
+def random_fleets(k, config = None, seed = None, chunk = 4096):
+    '''
+    This function draws k random fleets at once and returns them as one compact
+    array. The ships are placed in the same way as fleet_numbers does, but for
+    a whole chunk of fleets per NumPy operation: the occupied cells of every
+    fleet are kept as 64-bit words, and each ship picks uniformly among the
+    placements that do not intersect them.
+
+    That costs one operation per placement and word of the board, so boards
+    with more than 128 cells draw each fleet with fleet_numbers instead.
+
+    Args:
+        k: number of fleets
+        config: the GameConfig of the game, DEFAULT_CONFIG if not given
+        seed: seed of the random generator
+        chunk: number of fleets generated per pass, to bound memory use
+
+    Exceptions:
+        if there is no room left for one of the ships in some fleet
+
+    Returns: int16 NumPy array of shape (k, number of ships, 4) where the last
+             axis holds the start row, start column, end row and end column
+    '''
+    import numpy as np
+    config = config or DEFAULT_CONFIG
+    rows, cols = config.rows, config.cols
+    sizes = config.sizes()
+    words = (rows*cols + 63) // 64
+    indexes = [placement_index(size, rows, cols) for size in sizes]
+    #table of the (x0, y0, x1, y1) of every placement of every ship
+    tables = [np.array([start + end for start, end in index.ends], dtype=np.int16)
+              for index in indexes]
+
+    fleets = np.empty((k, len(sizes), 4), dtype=np.int16)
+    if words > 2:
+        rng = random.Random(seed)
+        for i in range(k):
+            numbers = fleet_numbers(rng, sizes, rows, cols)
+            for ship, number in enumerate(numbers):
+                fleets[i, ship] = tables[ship][number]
+        return fleets
+
+    rng = np.random.default_rng(seed)
+    masks = [_mask_words(index, words) for index in indexes]
+    for first in range(0, k, chunk):
+        n = min(chunk, k - first)
+        occupied = np.zeros((n, words), dtype=np.uint64)
+        for ship in range(len(sizes)):
+            overlap = occupied[:, 0, None] & masks[ship][None, :, 0]
+            for w in range(1, words):
+                overlap |= occupied[:, w, None] & masks[ship][None, :, w]
+            free = overlap == 0
+            counts = free.sum(axis=1)
+            if not counts.all():
+                raise Exception('No room left for a ship of size ' +
+                                str(sizes[ship]) + '.')
+            #number of the free placement to take in every fleet
+            pick = (rng.random(n) * counts).astype(np.int64)
+            seen = np.cumsum(free, axis=1, dtype=np.int32)
+            number = (seen > pick[:, None]).argmax(axis=1)
+            occupied |= masks[ship][number]
+            fleets[first:first + n, ship] = tables[ship][number]
+    return fleets
+
+
+def benchmark(n = 100000, config = None, seed = 0):
+    '''
+    This function measures how many fleets per second random_fleet and
+    random_fleets generate.
+
+    Returns: dictionary with the fleets/sec of both functions
+    '''
+    config = config or DEFAULT_CONFIG
+    rng = random.Random(seed)
+    begin = time.perf_counter()
+    for i in range(n):
+        random_fleet(rng, config)
+    single = n / (time.perf_counter() - begin)
+    begin = time.perf_counter()
+    random_fleets(n, config, seed)
+    batched = n / (time.perf_counter() - begin)
+    return {'random_fleet': single, 'random_fleets': batched}
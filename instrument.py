@@ -0,0 +1,233 @@
+'''
+Opt-in instrumentation of the game engine. Instruments.enable replaces the hot
+methods (PersonalBoard.place_piece, attack and opponent_move, Piece.hit,
+BattleShip.__main__ and simulate.play_game) with wrappers that count calls,
+outcomes and errors and time every call; disable puts the original methods
+back, so the engine runs unchanged code when instrumentation is off.
+
+The counters and timing histograms can be exported as a JSON snapshot or in
+the Prometheus text format.
+'''
+
+import json
+import time
+from bisect import bisect_left
+from functools import wraps
+
+#upper bounds in seconds of the histogram buckets, the last one is infinite
+BOUNDS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+          1e-3, 1e-2, 1e-1, 1.0, 10.0)
+
+#operation name, module, class (None for a function) and attribute patched
+TARGETS = (('place_piece', 'engine', 'PersonalBoard', 'place_piece'),
+           ('attack', 'engine', 'PersonalBoard', 'attack'),
+           ('opponent_move', 'engine', 'PersonalBoard', 'opponent_move'),
+           ('hit', 'engine', 'Piece', 'hit'),
+           ('game', 'battleship', 'BattleShip', '__main__'),
+           ('play_game', 'simulate', None, 'play_game'))
+
+#counters incremented for the messages of the exceptions raised
+ERRORS = {'Illegal overlapping of ships.': 'overlap_errors',
+          'Already attacked that square.': 'repeat_attack_errors'}
+
+#counters incremented for the outcomes of attacks, keyed by the first four
+#characters of the string returned by opponent_move
+OUTCOMES = {'miss': 'misses', 'hit': 'hits', 'sunk': 'sinks'}
+
+#the Instruments whose wrappers are installed
+_active = None
+
+
+class Histogram(object):
+    '''
+    Histogram counts observed durations in the buckets of BOUNDS and keeps
+    their number and sum.
+    '''
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def merge(self, other):
+        '''
+        Adds the observations of another Histogram.
+        '''
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def snapshot(self):
+        '''
+        Returns: dictionary with the count, sum, mean and the cumulative
+                 bucket counts keyed by upper bound
+        '''
+        buckets = {}
+        total = 0
+        for bound, count in zip(BOUNDS + ('+Inf',), self.counts):
+            total += count
+            buckets[str(bound)] = total
+        return {'count': self.count, 'sum': self.sum,
+                'mean': self.sum / self.count if self.count else 0.0,
+                'buckets': buckets}
+
+
+class Instruments(object):
+    '''
+    Instruments holds the counters and histograms of one profiling session:
+        self.counters: dictionary of counter names and values: calls of every
+                       operation, shots, misses, hits, sinks, games and the
+                       errors raised
+        self.histograms: dictionary of operation names and Histograms of the
+                         duration of their calls
+    '''
+
+    def __init__(self, targets = TARGETS):
+        '''
+        Args:
+            targets: tuples (operation, module, class, attribute) of the
+                     functions to instrument
+        '''
+        self.targets = targets
+        self.counters = {}
+        self.histograms = {}
+        self.originals = []
+
+    def reset(self):
+        '''
+        Sets every counter and histogram back to zero.
+        '''
+        self.counters = {}
+        for histogram in self.histograms.values():
+            histogram.__init__()
+
+    def count(self, name, value = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def _wrap(self, op, function):
+        '''
+        Returns a wrapper of function that times it and updates the counters
+        of op.
+        '''
+        histogram = self.histograms.setdefault(op, Histogram())
+        observe = histogram.observe
+        count = self.count
+        clock = time.perf_counter
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            begin = clock()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                observe(clock() - begin)
+                count(op + '_calls')
+                #an exception passing through nested wrappers counts once
+                if not getattr(e, 'instrumented', False):
+                    count(ERRORS.get(str(e), 'errors'))
+                    e.instrumented = True
+                raise
+            observe(clock() - begin)
+            count(op + '_calls')
+            if op == 'opponent_move':
+                #attack and make_move shoot through opponent_move
+                count('shots')
+                count(OUTCOMES[result[:4]])
+            elif op == 'game' or op == 'play_game':
+                count('games')
+            return result
+
+        return wrapper
+
+    def enable(self):
+        '''
+        This method installs the wrappers of the targets.
+
+        Exceptions:
+            if instrumentation is already enabled
+        '''
+        global _active
+        import importlib
+        if _active is not None:
+            raise Exception('Instrumentation already enabled.')
+        for op, module, cls, attr in self.targets:
+            owner = importlib.import_module(module)
+            if cls is not None:
+                owner = getattr(owner, cls)
+            original = owner.__dict__[attr]
+            self.originals.append((owner, attr, original))
+            setattr(owner, attr, self._wrap(op, original))
+        _active = self
+
+    def disable(self):
+        '''
+        This method puts back the original functions of the targets. The
+        counters and histograms are kept.
+        '''
+        global _active
+        for owner, attr, original in reversed(self.originals):
+            setattr(owner, attr, original)
+        self.originals = []
+        if _active is self:
+            _active = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.disable()
+
+    def merge(self, other):
+        '''
+        Adds the counters and histograms of another Instruments, e.g. of a
+        worker process.
+        '''
+        for name, value in other.counters.items():
+            self.count(name, value)
+        for op, histogram in other.histograms.items():
+            self.histograms.setdefault(op, Histogram()).merge(histogram)
+
+    def snapshot(self):
+        '''
+        Returns: dictionary with the counters and the snapshots of the
+                 histograms, in seconds
+        '''
+        return {'counters': dict(sorted(self.counters.items())),
+                'histograms': dict((op, histogram.snapshot()) for op, histogram
+                                   in sorted(self.histograms.items())
+                                   if histogram.count)}
+
+    def to_json(self, indent = None):
+        '''
+        Returns the snapshot as a JSON string.
+        '''
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix = 'battleship'):
+        '''
+        Returns the counters and histograms in the Prometheus text exposition
+        format, with the counters named prefix_name_total and the histograms
+        in prefix_op_seconds with an op label.
+        '''
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = '%s_%s_total' % (prefix, name)
+            lines.append('# TYPE %s counter' % metric)
+            lines.append('%s %d' % (metric, value))
+        metric = prefix + '_op_seconds'
+        lines.append('# TYPE %s histogram' % metric)
+        for op, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            for bound, total in histogram.snapshot()['buckets'].items():
+                lines.append('%s_bucket{op="%s",le="%s"} %d' %
+                             (metric, op, bound, total))
+            lines.append('%s_sum{op="%s"} %r' % (metric, op, histogram.sum))
+            lines.append('%s_count{op="%s"} %d' % (metric, op, histogram.count))
+        return '\n'.join(lines) + '\n'
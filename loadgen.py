@@ -0,0 +1,133 @@
+'''
+Load generator for server.py. It keeps a number of games open at the same
+time, each on its own connection, plays them to the end with random fleets and
+hunt/target attacks, and reports the latency of the attack requests.
+'''
+
+import asyncio
+import json
+import random
+import time
+
+from engine import DEFAULT_CONFIG
+from fleets import random_fleet
+from server import GameServer
+from simulate import HuntShooter
+
+
+def percentile(values, fraction):
+    '''
+    Returns the value below which the given fraction of the sorted list values
+    falls.
+    '''
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def _request(reader, writer, request):
+    '''
+    Sends one request line and returns the decoded response.
+    '''
+    writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError('Server closed the connection.')
+    return json.loads(line)
+
+
+async def play_one(connect, rng, config, latencies):
+    '''
+    This function plays one whole game over a new connection and appends the
+    latency of every attack to latencies.
+
+    Args:
+        connect: coroutine function returning a (reader, writer) pair
+        rng: random.Random instance
+        config: the GameConfig of the server
+        latencies: list of seconds
+
+    Exceptions:
+        if the server rejects a request
+    '''
+    reader, writer = await connect()
+    try:
+        for player in (1, 2):
+            for start, end, name in random_fleet(rng, config):
+                response = await _request(reader, writer, {
+                    'cmd': 'place', 'start': start, 'end': end, 'name': name})
+                if not response['ok']:
+                    raise Exception(response['error'])
+        shooters = {1: HuntShooter(rng, config), 2: HuntShooter(rng, config)}
+        player = 1
+        while True:
+            cell = shooters[player].next_shot()
+            begin = time.perf_counter()
+            response = await _request(reader, writer, {'cmd': 'attack',
+                                                       'cell': cell})
+            latencies.append(time.perf_counter() - begin)
+            if not response['ok']:
+                raise Exception(response['error'])
+            shooters[player].record(cell, response['result'])
+            if 'winner' in response:
+                return
+            player = response['next']
+    finally:
+        writer.close()
+
+
+async def run_load(games, concurrency, host = '127.0.0.1', port = 8765,
+                   path = None, config = DEFAULT_CONFIG, seed = 0):
+    '''
+    This function plays games against a running server, keeping concurrency
+    games open at the same time.
+
+    Args:
+        games: total number of games to play
+        concurrency: number of games played simultaneously
+        host, port: address of the server, or
+        path: its Unix socket
+        config: the GameConfig of the server
+        seed: seed of the random.Random used by all the games
+
+    Returns: dictionary with the number of games and moves, the wall time,
+             games per second and the p50 and p99 move latencies in seconds
+    '''
+    if path is not None:
+        connect = lambda: asyncio.open_unix_connection(path)
+    else:
+        connect = lambda: asyncio.open_connection(host, port)
+    rng = random.Random(seed)
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def game():
+        async with slots:
+            await play_one(connect, rng, config, latencies)
+
+    begin = time.perf_counter()
+    await asyncio.gather(*[game() for i in range(games)])
+    wall = time.perf_counter() - begin
+    latencies.sort()
+    return {'games': games,
+            'moves': len(latencies),
+            'seconds': wall,
+            'games_per_sec': games / wall if wall > 0 else 0.0,
+            'p50': percentile(latencies, 0.50),
+            'p99': percentile(latencies, 0.99)}
+
+
+async def run_local(games, concurrency, config = DEFAULT_CONFIG, seed = 0):
+    '''
+    This function starts a GameServer on a free local port, runs run_load
+    against it in the same event loop and stops the server.
+
+    Returns: the dictionary returned by run_load
+    '''
+    server = await GameServer(config).start('127.0.0.1', 0)
+    try:
+        host, port = server.address()[:2]
+        return await run_load(games, concurrency, host, port, None, config, seed)
+    finally:
+        await server.close()
@@ -0,0 +1,289 @@
+'''
+Opening book of the probability-density AI. Early in a game almost every
+placement is still possible, which is when ai.best_shot is the most expensive,
+and yet the same few views come back in every game. The book maps those views
+to their best shot, so the first shots of a game cost a hash lookup.
+
+Views are reduced by the symmetries of the board (the 8 rotations and
+reflections of a square board, the 4 that keep the shape of a rectangular one):
+the book stores each view in its canonical orientation, the one with the
+smallest bytes, together with the sizes of the ships afloat, under a 64-bit
+hash. The book is built offline by playing games with ai.DensityShooter,
+
+    python opening.py --games 2000 --depth 15
+
+which is how opening.book, the book of the standard game shipped next to
+this module, was made. Books are saved as
+
+    header: b'BSOB', version (u8), depth (u8), rows (u16), cols (u16), number
+            of ships (u8), the size of every ship (u16 each), number of
+            entries (u32)
+    keys:   u64 per entry, sorted
+    shots:  u16 per entry, the cell x*cols + y of the best shot of the
+            canonical view
+
+with little-endian integers, where depth is the largest number of shots of
+the views of the book. It is read from disk the first time it is used, and
+views with more shots are not looked up.
+'''
+
+import hashlib
+import os
+import random
+import struct
+import warnings
+
+import numpy as np
+
+import ai
+from engine import DEFAULT_CONFIG
+
+MAGIC = b'BSOB'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sBBHHB')
+_COUNT = struct.Struct('<I')
+
+#book of the standard game, used by BattleShip.computer_move
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'opening.book')
+
+#symmetries of the boards, keyed by (rows, cols)
+_SYMMETRIES = {}
+
+#books loaded by default_book, keyed by path and GameConfig
+_BOOKS = {}
+
+
+def symmetries(rows, cols):
+    '''
+    This function returns the symmetries of a board as permutations of its
+    cells: the view in orientation s is view.ravel()[s], and the cell c of
+    that view is the cell s[c] of the original one.
+
+    Returns: list of int arrays
+    '''
+    key = (rows, cols)
+    if key not in _SYMMETRIES:
+        cells = np.arange(rows * cols).reshape(rows, cols)
+        grids = [cells, cells[::-1], cells[:, ::-1], cells[::-1, ::-1]]
+        if rows == cols:
+            grids += [grid.T for grid in grids]
+        perms = []
+        for grid in grids:
+            perm = np.ascontiguousarray(grid).ravel()
+            if not any((perm == other).all() for other in perms):
+                perms.append(perm)
+        _SYMMETRIES[key] = perms
+    return _SYMMETRIES[key]
+
+
+def canonical(view, sizes):
+    '''
+    This function finds the canonical orientation of a view.
+
+    Args:
+        view: 2D array of cell codes (see ai.opponent_view)
+        sizes: sizes of the ships that have not been sunk
+
+    Returns: tuple (key, canonical view as a flat int8 array, permutation of
+             the orientation)
+    '''
+    flat = np.ascontiguousarray(view, dtype=np.int8).ravel()
+    best = None
+    for perm in symmetries(*view.shape):
+        data = flat[perm].tobytes()
+        if best is None or data < best[0]:
+            best = (data, perm)
+    data, perm = best
+    sizes = sorted(sizes)
+    digest = hashlib.blake2b(data + struct.pack('<%dH' % len(sizes), *sizes),
+                             digest_size=8).digest()
+    return (int.from_bytes(digest, 'little'),
+            np.frombuffer(data, dtype=np.int8), perm)
+
+
+class OpeningBook(object):
+    '''
+    OpeningBook answers lookups from a book file, which is read the first
+    time a lookup is made.
+    '''
+
+    def __init__(self, path, config = DEFAULT_CONFIG):
+        '''
+        Args:
+            path: name of the book file
+            config: the GameConfig of the games
+        '''
+        self.path = path
+        self.config = config
+        self.entries = None
+        self.depth = 0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        '''
+        This method reads the book file.
+
+        Exceptions:
+            if the file is not a book for the GameConfig
+        '''
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        magic, version, depth, rows, cols, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception('Not an opening book file.')
+        offset = _HEADER.size
+        sizes = list(struct.unpack_from('<%dH' % count, data, offset))
+        offset += 2 * count
+        if (rows, cols, sizes) != (self.config.rows, self.config.cols,
+                                   self.config.sizes()):
+            raise Exception('Opening book is for another game configuration.')
+        entries = _COUNT.unpack_from(data, offset)[0]
+        offset += _COUNT.size
+        keys = np.frombuffer(data, dtype='<u8', count=entries, offset=offset)
+        shots = np.frombuffer(data, dtype='<u2', count=entries,
+                              offset=offset + 8*entries)
+        self.entries = dict(zip(keys.tolist(), shots.tolist()))
+        self.depth = depth
+
+    def __len__(self):
+        if self.entries is None:
+            self.load()
+        return len(self.entries)
+
+    def lookup(self, view, sizes):
+        '''
+        This method returns the book shot of a view.
+
+        Args:
+            view: 2D array of cell codes (see ai.opponent_view)
+            sizes: sizes of the ships that have not been sunk
+
+        Returns: tuple with board coordinates, or None if the view is not in
+                 the book
+        '''
+        if self.entries is None:
+            self.load()
+        if np.count_nonzero(view) > self.depth:
+            return None
+        key, data, perm = canonical(view, sizes)
+        shot = self.entries.get(key)
+        if shot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return divmod(int(perm[shot]), view.shape[1])
+
+
+def build(config = DEFAULT_CONFIG, depth = 15, games = 2000, seed = 0):
+    '''
+    This function plays games of ai.DensityShooter against random fleets and
+    records the best shot of the canonical form of every view met in the
+    first depth shots.
+
+    Args:
+        config: the GameConfig of the games
+        depth: number of shots per game entered in the book
+        games: number of games played
+        seed: seed of the fleets
+
+    Returns: dictionary from keys to the cell index of the best shot
+    '''
+    from bitboard import BitBoard
+    from fleets import random_fleet
+    rng = random.Random(seed)
+    entries = {}
+    for game in range(games):
+        board = BitBoard(config)
+        for start, end, name in random_fleet(rng, config):
+            board.place_piece(start, end, name)
+        shooter = ai.DensityShooter(rng, config)
+        for shot in range(depth):
+            key, data, perm = canonical(shooter.view, shooter.sizes)
+            if key not in entries:
+                x, y = ai.best_shot(data.reshape(shooter.view.shape),
+                                    shooter.sizes)
+                entries[key] = x*config.cols + y
+            cell = shooter.next_shot()
+            shooter.record(cell, board.opponent_move(cell))
+            if board.game_over():
+                break
+    return entries
+
+
+def save(path, entries, config = DEFAULT_CONFIG, depth = 15):
+    '''
+    This function writes a book file.
+
+    Args:
+        path: name of the file
+        entries: dictionary returned by build
+        config: the GameConfig of the games
+        depth: the depth entries were built with
+    '''
+    sizes = config.sizes()
+    keys = np.array(sorted(entries), dtype='<u8')
+    shots = np.array([entries[key] for key in keys.tolist()], dtype='<u2')
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, depth, config.rows, config.cols,
+                             len(sizes)))
+        f.write(struct.pack('<%dH' % len(sizes), *sizes))
+        f.write(_COUNT.pack(len(keys)))
+        f.write(keys.tobytes())
+        f.write(shots.tobytes())
+
+
+def default_book(config = DEFAULT_CONFIG, path = BOOK_PATH):
+    '''
+    This function returns the OpeningBook of the file path, or None if there
+    is no such file. A file that cannot be loaded, e.g. a book for another
+    GameConfig, is reported with a warning and also gives None. Books are
+    loaded once.
+    '''
+    key = (path, config.rows, config.cols, tuple(config.sizes()))
+    if key not in _BOOKS:
+        book = OpeningBook(path, config)
+        try:
+            book.load()
+        except FileNotFoundError:
+            book = None
+        except Exception as e:
+            warnings.warn('Opening book ' + path + ' not loaded: ' + str(e))
+            book = None
+        _BOOKS[key] = book
+    return _BOOKS[key]
+
+
+def best_shot(view, sizes, book = None):
+    '''
+    This function returns the book shot of a view if there is one, and
+    ai.best_shot otherwise.
+    '''
+    if book is not None:
+        cell = book.lookup(view, sizes)
+        if cell is not None:
+            return cell
+    return ai.best_shot(view, sizes)
+
+
+def main(argv = None):
+    '''
+    Builds the book of the standard game from the command line.
+    '''
+    #argparse is only needed when the module is run
+    import argparse
+    parser = argparse.ArgumentParser(description='Build the opening book.')
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--depth', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=BOOK_PATH)
+    args = parser.parse_args(argv)
+    entries = build(DEFAULT_CONFIG, args.depth, args.games, args.seed)
+    save(args.output, entries, DEFAULT_CONFIG, args.depth)
+    print(str(len(entries)) + ' views written to ' + args.output + '.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+'''
+Index of every legal placement of a ship of a given size, built the first time
+it is needed and shared afterwards. Placements are stored as cell bitmasks (see
+bitboard.cell_bit), so placement code can work with bit operations instead of
+constructing Piece objects.
+'''
+
+#built indexes, keyed by (size, rows, cols)
+_INDEXES = {}
+
+
+class PlacementIndex(object):
+    '''
+    PlacementIndex lists all the horizontal and then all the vertical
+    placements of a ship of one size on a board, and keeps the reverse index
+    from every cell to the placements covering it.
+    '''
+
+    def __init__(self, size, rows = 10, cols = 10):
+        '''
+        Builds the index with the following instance variables:
+            self.size, self.rows, self.cols: the ship size and board dimensions
+            self.ends: list of (start, end) tuples of board coordinates
+            self.cells: list of tuples with the cell indices (x*cols + y) of
+                        each placement
+            self.masks: list of the bitmasks of each placement
+            self.covering: list indexed by cell of the lists of the placements
+                           covering that cell
+            self.lookup: dictionary from (start, end), in either order, to the
+                         number of the placement
+        '''
+        self.size = size
+        self.rows = rows
+        self.cols = cols
+        self.ends = []
+        self.cells = []
+        for x in range(rows):
+            for y in range(cols - size + 1):
+                self.ends.append(((x, y), (x, y + size - 1)))
+                first = x*cols + y
+                self.cells.append(tuple(range(first, first + size)))
+        #a ship of size 1 is the same placement in both orientations
+        if size > 1:
+            for x in range(rows - size + 1):
+                for y in range(cols):
+                    self.ends.append(((x, y), (x + size - 1, y)))
+                    first = x*cols + y
+                    self.cells.append(tuple(range(first, first + size*cols, cols)))
+
+        self.masks = []
+        self.covering = [[] for i in range(rows * cols)]
+        self.lookup = {}
+        for number, (start, end) in enumerate(self.ends):
+            cells = self.cells[number]
+            mask = 0
+            for cell in cells:
+                mask |= 1 << cell
+                self.covering[cell].append(number)
+            self.masks.append(mask)
+            self.lookup[(start, end)] = number
+            self.lookup[(end, start)] = number
+        self._array = None
+
+    def __len__(self):
+        '''
+        Returns the number of placements.
+        '''
+        return len(self.masks)
+
+    def find(self, start, end):
+        '''
+        Returns the number of the placement going from start to end, or None if
+        it is not a legal placement of this size on the board.
+        '''
+        return self.lookup.get((start, end))
+
+    def free(self, blocked):
+        '''
+        Returns the numbers of the placements that do not cover any cell of the
+        bitmask blocked.
+        '''
+        return [i for i, mask in enumerate(self.masks) if not mask & blocked]
+
+    @property
+    def array(self):
+        '''
+        The placements as a NumPy boolean array with one row per placement and
+        one column per cell, built on first access.
+        '''
+        if self._array is None:
+            import numpy as np
+            array = np.zeros((len(self.cells), self.rows * self.cols), dtype=bool)
+            for number, cells in enumerate(self.cells):
+                array[number, list(cells)] = True
+            self._array = array
+        return self._array
+
+
+def placement_index(size, rows = 10, cols = 10):
+    '''
+    This function returns the PlacementIndex of a ship size on a board of the
+    given dimensions, building it on the first call.
+
+    Returns: PlacementIndex
+    '''
+    key = (size, rows, cols)
+    index = _INDEXES.get(key)
+    if index is None:
+        index = _INDEXES[key] = PlacementIndex(size, rows, cols)
+    return index
@@ -0,0 +1,264 @@
+'''
+Compact binary game records. A record file starts with a header describing the
+GameConfig of its games, followed by the games one after the other:
+
+    header: b'BSGR', version (u8), rows (u16), cols (u16), number of ships (u8),
+            then for every ship its size (u16), name length (u8) and name
+    game:   winner (u8), number of shots (u16), the start and end cell of every
+            ship of player 1 and then of player 2 (u16 each), and one u16 per
+            shot holding cell << 2 | outcome
+
+Cells are numbered x*cols + y and all integers are little-endian. The player
+who fired each shot is not stored: player 1 fires first and the turn passes on
+every miss, as in BattleShip.__main__.
+
+GameWriter appends games to a file; GameReader memory-maps a file and decodes
+games, or hands out NumPy views of them, as they are reached.
+'''
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from engine import GameConfig
+
+MAGIC = b'BSGR'
+VERSION = 1
+
+#outcome of a shot
+MISS = 0
+HIT = 1
+SUNK = 2
+
+_HEADER = struct.Struct('<4sBHHB')
+_SHIP = struct.Struct('<HB')
+_GAME = struct.Struct('<BH')
+
+#winner: 1 or 2; fleets: the two lists of (start, end, name) tuples in the
+#order of the fleet of the GameConfig; shots: list of (cell, outcome) tuples
+GameRecord = namedtuple('GameRecord', ['winner', 'fleets', 'shots'])
+
+
+def outcome(result):
+    '''
+    This function converts a string returned by opponent_move into an outcome.
+
+    Returns: int
+    '''
+    if result == 'miss':
+        return MISS
+    if result == 'hit':
+        return HIT
+    return SUNK
+
+
+def encode_header(config):
+    '''
+    This function returns the header of a record file for games of config.
+
+    Exceptions:
+        if the board has too many cells to be recorded
+
+    Returns: bytes
+    '''
+    if config.rows * config.cols > 1 << 14:
+        raise Exception('Board too large to record.')
+    parts = [_HEADER.pack(MAGIC, VERSION, config.rows, config.cols,
+                          len(config.fleet))]
+    for name, size in config.fleet:
+        encoded = name.encode('utf-8')
+        parts.append(_SHIP.pack(size, len(encoded)) + encoded)
+    return b''.join(parts)
+
+
+def decode_header(data):
+    '''
+    This function reads the header at the start of data.
+
+    Exceptions:
+        if data does not start with a record file header
+
+    Returns: tuple (GameConfig, size of the header in bytes)
+    '''
+    magic, version, rows, cols, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise Exception('Not a game record file.')
+    offset = _HEADER.size
+    fleet = []
+    for i in range(count):
+        size, length = _SHIP.unpack_from(data, offset)
+        offset += _SHIP.size
+        fleet.append((bytes(data[offset:offset + length]).decode('utf-8'), size))
+        offset += length
+    return GameConfig(rows, cols, fleet), offset
+
+
+class GameWriter(object):
+    '''
+    GameWriter appends game records to a file, writing the header first if the
+    file is new. It can be used as a context manager.
+    '''
+
+    def __init__(self, path, config):
+        '''
+        Opens path for appending.
+
+        Args:
+            path: name of the record file
+            config: the GameConfig of the games to record
+
+        Exceptions:
+            if the file already holds games of another GameConfig
+        '''
+        self.config = config
+        self.cols = config.cols
+        self.order = dict((name, i) for i, (name, size) in enumerate(config.fleet))
+        header = encode_header(config)
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(header)
+        else:
+            with open(path, 'rb') as existing:
+                if existing.read(len(header)) != header:
+                    self.file.close()
+                    raise Exception('Record file is for another game '
+                                    'configuration.')
+
+    def write(self, winner, fleets, shots):
+        '''
+        This method appends one game.
+
+        Args:
+            winner: 1 or 2
+            fleets: the two fleets as lists of (start, end, name) tuples, in
+                    any order
+            shots: list of (cell, result) tuples in the order the shots were
+                   fired, where result is the string returned by
+                   opponent_move or an outcome
+        '''
+        cols = self.cols
+        ends = [0] * (4 * len(self.order))
+        for player, fleet in enumerate(fleets):
+            for start, end, name in fleet:
+                i = 2 * (player * len(self.order) + self.order[name])
+                ends[i] = start[0]*cols + start[1]
+                ends[i+1] = end[0]*cols + end[1]
+        codes = [(x*cols + y) << 2 | (result if isinstance(result, int)
+                                      else outcome(result))
+                 for (x, y), result in shots]
+        self.file.write(_GAME.pack(winner, len(codes)) +
+                        struct.pack('<%dH' % (len(ends) + len(codes)),
+                                    *(ends + codes)))
+
+    def close(self):
+        '''
+        Flushes and closes the file.
+        '''
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class GameReader(object):
+    '''
+    GameReader memory-maps a record file. Games are decoded only when they are
+    reached, so files much larger than memory can be scanned. It can be used as
+    a context manager.
+    '''
+
+    def __init__(self, path):
+        '''
+        Maps path and reads its header into self.config.
+
+        Exceptions:
+            if the file is not a record file
+        '''
+        self.file = open(path, 'rb')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.close()
+            raise Exception('Not a game record file.')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.config, self.start = decode_header(self.data)
+        self.ships = len(self.config.fleet)
+
+    def offsets(self):
+        '''
+        This generator yields the offset in the file of every game, reading
+        only the fixed-size start of each one.
+
+        Returns: iterator of ints
+        '''
+        data = self.data
+        offset = self.start
+        skip = _GAME.size + 8 * self.ships
+        while offset < len(data):
+            yield offset
+            offset += skip + 2 * _GAME.unpack_from(data, offset)[1]
+
+    def read(self, offset):
+        '''
+        This method decodes the game at offset.
+
+        Returns: GameRecord
+        '''
+        winner, count = _GAME.unpack_from(self.data, offset)
+        values = struct.unpack_from('<%dH' % (4*self.ships + count), self.data,
+                                    offset + _GAME.size)
+        cols = self.config.cols
+        fleets = []
+        for player in range(2):
+            fleet = []
+            for i, (name, size) in enumerate(self.config.fleet):
+                j = 2 * (player*self.ships + i)
+                fleet.append((divmod(values[j], cols), divmod(values[j+1], cols),
+                              name))
+            fleets.append(fleet)
+        shots = [(divmod(code >> 2, cols), code & 3)
+                 for code in values[4*self.ships:]]
+        return GameRecord(winner, fleets, shots)
+
+    def __iter__(self):
+        '''
+        Yields every game of the file as a GameRecord.
+        '''
+        for offset in self.offsets():
+            yield self.read(offset)
+
+    def arrays(self):
+        '''
+        This generator yields every game as NumPy views of the mapped file,
+        without copying: a tuple (winner, ends, shots) where ends is a uint16
+        array of shape (2, ships, 2) with the start and end cells of the ships
+        of both players and shots is a uint16 array of cell << 2 | outcome.
+
+        Returns: iterator of tuples
+        '''
+        import numpy as np
+        data = self.data
+        for offset in self.offsets():
+            winner, count = _GAME.unpack_from(data, offset)
+            offset += _GAME.size
+            ends = np.frombuffer(data, dtype='<u2', count=4*self.ships,
+                                 offset=offset).reshape(2, self.ships, 2)
+            shots = np.frombuffer(data, dtype='<u2', count=count,
+                                  offset=offset + 8*self.ships)
+            yield winner, ends, shots
+
+    def close(self):
+        '''
+        Unmaps and closes the file. Views returned by arrays must have been
+        released first.
+        '''
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,198 @@
+'''
+Terminal rendering of boards for spectators and replays. BoardRenderer keeps
+the last frame it drew and, on the next one, only rewrites the cells that
+changed, moving the cursor with ANSI escape codes. Several renderers can share
+one terminal, each drawing its board at its own origin, and their output can
+be collected in a buffer and written in one call.
+'''
+
+import io
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from battleship import DEFAULT_CONFIG, BattleShip, PersonalBoard
+
+#ANSI escape codes
+CLEAR = '\x1b[2J'
+MOVE = '\x1b[%d;%dH'
+
+
+def _own(val):
+    '''
+    Returns the text of a cell as print_board shows it.
+    '''
+    return str(val)
+
+
+def _opponent(val):
+    '''
+    Returns the text of a cell as print_board_opp_pov shows it.
+    '''
+    return val if val in ('M', 'H', 'S') else '0'
+
+
+class BoardRenderer(object):
+    '''
+    BoardRenderer draws a board matrix with the layout of BattleShip.print_board,
+    or of print_board_opp_pov if opponent is set, at a fixed place of the
+    terminal. The first frame draws every cell; later frames only move the
+    cursor to the cells whose value changed and rewrite them.
+    '''
+
+    def __init__(self, rows = 10, cols = 10, opponent = False, out = None,
+                 origin = (1, 1), width = 6, batch = False, clear = False):
+        '''
+        Args:
+            rows, cols: dimensions of the boards to draw
+            opponent: if True, hide the ships like print_board_opp_pov
+            out: file to write to, sys.stdout by default
+            origin: terminal row and column of the top left cell, from 1
+            width: characters per cell, 6 as in print_board
+            batch: if True, draw only collects the frames and flush writes them
+            clear: if True, the first frame clears the terminal first
+        '''
+        self.rows = rows
+        self.cols = cols
+        self.text = _opponent if opponent else _own
+        self.out = out
+        self.top, self.left = origin
+        self.width = width
+        self.batch = batch
+        self.pending = []
+        self.values = None
+        self.clear = clear
+        #cursor position codes of every cell, and of the line below the board
+        self.moves = [[MOVE % (self.top + i, self.left + j*width)
+                       for j in range(cols)] for i in range(rows)]
+        self.park = MOVE % (self.top + rows, 1)
+
+    def invalidate(self, clear = False):
+        '''
+        Forgets the last frame, so the next one redraws every cell, e.g.
+        after the terminal has been cleared. If clear is True, the next frame
+        clears the terminal itself before drawing.
+        '''
+        self.values = None
+        self.clear = clear
+
+    def frame(self, board):
+        '''
+        This method returns the escape codes and text that turn the last frame
+        into board, and remembers board as the last frame.
+
+        Args:
+            board: matrix of the dimensions of the renderer, as
+                   PersonalBoard.board
+
+        Returns: string
+        '''
+        text = self.text
+        width = self.width
+        parts = []
+        if self.values is None:
+            if self.clear:
+                parts.append(CLEAR)
+                self.clear = False
+            for i, row in enumerate(board):
+                parts.append(self.moves[i][0])
+                parts.append(''.join([text(val).ljust(width) for val in row]))
+            self.values = [list(row) for row in board]
+        else:
+            values = self.values
+            for i, row in enumerate(board):
+                last = values[i]
+                #list comparison skips the unchanged rows without a Python loop
+                if row == last:
+                    continue
+                moves = self.moves[i]
+                for j, val in enumerate(row):
+                    if val != last[j]:
+                        before = text(last[j])
+                        last[j] = val
+                        #the opponent's view of a ship placement is unchanged
+                        if text(val) != before:
+                            parts.append(moves[j])
+                            parts.append(text(val).ljust(width))
+            if not parts:
+                return ''
+        parts.append(self.park)
+        return ''.join(parts)
+
+    def draw(self, board):
+        '''
+        This method renders board, writing the frame right away or, in batch
+        mode, keeping it until flush.
+        '''
+        frame = self.frame(board)
+        if not frame:
+            return
+        if self.batch:
+            self.pending.append(frame)
+        else:
+            out = self.out or sys.stdout
+            out.write(frame)
+            out.flush()
+
+    def flush(self):
+        '''
+        Writes the frames collected in batch mode with a single write call.
+        '''
+        if self.pending:
+            out = self.out or sys.stdout
+            out.write(''.join(self.pending))
+            out.flush()
+            self.pending = []
+
+
+def benchmark(frames = 2000, config = DEFAULT_CONFIG, seed = 0):
+    '''
+    This function compares the frames per second of print_board,
+    print_board_opp_pov and BoardRenderer, redrawing a board after every shot
+    of random games. The output goes to an in-memory buffer so the terminal
+    does not limit the measurement.
+
+    Args:
+        frames: number of frames to draw with each method
+        config: the GameConfig of the boards
+        seed: seed of the random placements and shots
+
+    Returns: dictionary with the frames per second of every method
+    '''
+    import simulate
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < frames:
+        board = PersonalBoard(config)
+        for start, end, name in simulate.random_placement(rng, config):
+            board.place_piece(start, end, name)
+        cells = [(x, y) for x in range(config.rows) for y in range(config.cols)]
+        rng.shuffle(cells)
+        for cell in cells:
+            board.opponent_move(cell)
+            boards.append([list(row) for row in board.board])
+            if board.game_over() or len(boards) == frames:
+                break
+    game = BattleShip(config=config)
+    results = {}
+
+    def timed(name, draw, done = None):
+        buffer = io.StringIO()
+        begin = time.perf_counter()
+        with redirect_stdout(buffer):
+            for board in boards:
+                draw(board)
+            if done is not None:
+                done()
+        results[name] = frames / (time.perf_counter() - begin)
+
+    timed('print_board', game.print_board)
+    timed('print_board_opp_pov', game.print_board_opp_pov)
+    for opponent in (False, True):
+        suffix = '_opp_pov' if opponent else ''
+        renderer = BoardRenderer(config.rows, config.cols, opponent)
+        timed('renderer' + suffix, renderer.draw)
+        renderer = BoardRenderer(config.rows, config.cols, opponent, batch=True)
+        timed('renderer_batch' + suffix, renderer.draw, renderer.flush)
+    return results
@@ -0,0 +1,255 @@
+'''
+Replays of recorded games. Replay applies the shots of a GameRecord to two
+BitBoards and keeps a checkpoint of both boards every few turns, so moving to
+any turn restores the checkpoint before it and applies at most interval - 1
+shots, instead of replaying the game from the start.
+'''
+
+import random
+import time
+
+from battleship import DEFAULT_CONFIG, BattleShip
+from bitboard import BitBoard
+from records import MISS, GameReader, GameRecord, outcome
+
+
+class Replay(object):
+    '''
+    Replay holds one recorded game positioned at a turn, the number of shots
+    applied so far. Player 1 fires first and the turn passes on every miss, as
+    in BattleShip.__main__.
+    '''
+
+    def __init__(self, record, config = DEFAULT_CONFIG, interval = 64):
+        '''
+        Places the fleets of record and positions the replay at turn 0.
+
+        Args:
+            record: a records.GameRecord; the results of its shots may be
+                    outcomes or the strings returned by opponent_move
+            config: the GameConfig of the game
+            interval: number of turns between checkpoints
+
+        Exceptions:
+            if interval is not positive
+            if a fleet of the record is not legal
+        '''
+        if interval < 1:
+            raise Exception('Checkpoint interval must be positive.')
+        self.config = config
+        self.interval = interval
+        self.winner = record.winner
+        self.cells = [tuple(cell) for cell, result in record.shots]
+        self.outcomes = [result if isinstance(result, int) else outcome(result)
+                         for cell, result in record.shots]
+        #player who fired every shot
+        self.shooters = []
+        player = 1
+        for result in self.outcomes:
+            self.shooters.append(player)
+            if result == MISS:
+                player = 3 - player
+        self.player1 = BitBoard(config)
+        self.player2 = BitBoard(config)
+        for board, fleet in zip((self.player1, self.player2), record.fleets):
+            for start, end, name in fleet:
+                board.place_piece(tuple(start), tuple(end), name)
+        self.turn = 0
+        self.checkpoints = [self._checkpoint()]
+
+    def __len__(self):
+        '''
+        Returns the number of shots of the game.
+        '''
+        return len(self.cells)
+
+    def _checkpoint(self):
+        '''
+        Returns the snapshots of both boards.
+        '''
+        return self.player1.snapshot(), self.player2.snapshot()
+
+    def target(self, turn):
+        '''
+        Returns the BitBoard attacked by the shot of turn.
+        '''
+        return self.player2 if self.shooters[turn] == 1 else self.player1
+
+    def _apply(self):
+        '''
+        Applies the shot of the current turn and saves a checkpoint when the
+        next turn starts a new interval.
+
+        Exceptions:
+            if the result of the shot is not the recorded one
+        '''
+        turn = self.turn
+        result = self.target(turn).opponent_move(self.cells[turn])
+        if outcome(result) != self.outcomes[turn]:
+            raise Exception('Record does not match the game.')
+        self.turn += 1
+        if (self.turn % self.interval == 0 and
+                len(self.checkpoints) == self.turn // self.interval):
+            self.checkpoints.append(self._checkpoint())
+
+    def seek(self, turn):
+        '''
+        This method positions the replay after the first turn shots. Moving
+        backwards, or forwards past a checkpoint that already exists, restores
+        the nearest checkpoint before turn first.
+
+        Args:
+            turn: number of shots applied, from 0 to len(self)
+
+        Exceptions:
+            if turn is out of range
+        '''
+        if turn < 0 or turn > len(self.cells):
+            raise Exception('Turn out of range.')
+        index = min(turn // self.interval, len(self.checkpoints) - 1)
+        if turn < self.turn or index * self.interval > self.turn:
+            snapshot1, snapshot2 = self.checkpoints[index]
+            self.player1.restore(snapshot1)
+            self.player2.restore(snapshot2)
+            self.turn = index * self.interval
+        while self.turn < turn:
+            self._apply()
+
+    def step(self):
+        '''
+        Applies the next shot.
+
+        Returns: False if the game was already at its last turn, else True
+        '''
+        if self.turn == len(self.cells):
+            return False
+        self._apply()
+        return True
+
+    def back(self):
+        '''
+        Takes back the last shot.
+
+        Returns: False if the game was already at turn 0, else True
+        '''
+        if self.turn == 0:
+            return False
+        self.seek(self.turn - 1)
+        return True
+
+    def frames(self, start = 0, stop = None, step = 1):
+        '''
+        This generator moves through the turns range(start, stop, step),
+        backwards if step is negative, and yields after reaching each one.
+
+        Args:
+            start, stop, step: as in range, stop defaults to len(self) + 1 or
+                               to -1 when step is negative
+
+        Returns: iterator of tuples (turn, player who fired the last shot or
+                 None at turn 0, opponent's view of the board attacked by that
+                 shot), where the view has the cells of print_board_opp_pov:
+                 'M', 'H', 'S' or 0
+        '''
+        if stop is None:
+            stop = len(self.cells) + 1 if step > 0 else -1
+        for turn in range(start, stop, step):
+            self.seek(turn)
+            if turn == 0:
+                yield turn, None, self.view(self.player2)
+            else:
+                yield (turn, self.shooters[turn - 1],
+                       self.view(self.target(turn - 1)))
+
+    def view(self, board):
+        '''
+        Returns the matrix of board as print_board_opp_pov shows it.
+        '''
+        return [[val if val in ('M', 'H', 'S') else 0 for val in row]
+                for row in board.board]
+
+    def show(self):
+        '''
+        Prints the current turn and both boards as their opponents see them.
+        '''
+        game = BattleShip(config=self.config)
+        print('Turn ' + str(self.turn) + ' of ' + str(len(self.cells)) + '.')
+        print('Player 1:')
+        game.print_board_opp_pov(self.player1.board)
+        print('Player 2:')
+        game.print_board_opp_pov(self.player2.board)
+
+
+def open_replay(path, game = 0, interval = 64):
+    '''
+    This function reads one game of a record file and returns its Replay.
+
+    Args:
+        path: name of the record file
+        game: index of the game in the file
+        interval: number of turns between checkpoints
+
+    Exceptions:
+        if the file has fewer games
+    '''
+    with GameReader(path) as reader:
+        for i, offset in enumerate(reader.offsets()):
+            if i == game:
+                return Replay(reader.read(offset), reader.config, interval)
+    raise Exception('No such game in the record file.')
+
+
+class _Keep(object):
+    '''
+    Stand-in for a GameWriter that keeps the last game written.
+    '''
+
+    def write(self, winner, fleets, shots):
+        self.game = GameRecord(winner, fleets, list(shots))
+
+
+def benchmark(seeks = 1000, dimensions = (25, 50, 100), interval = 64,
+              seed = 0):
+    '''
+    This function records one game between random shooters on square boards
+    of every dimension, which makes long games, and measures the latency of
+    seeking to random turns with checkpoints and by replaying from turn 0.
+
+    Args:
+        seeks: number of random seeks per board
+        dimensions: board sizes to measure
+        interval: number of turns between checkpoints
+        seed: seed of the game and of the seeks
+
+    Returns: list of dictionaries with the dimension, the number of shots and
+             the mean and p99 seek latency in microseconds with and without
+             checkpoints
+    '''
+    import simulate
+    from engine import GameConfig
+    results = []
+    for n in dimensions:
+        config = GameConfig(n, n)
+        keep = _Keep()
+        rng = random.Random(seed)
+        simulate.play_game(simulate.random_placement, simulate.random_placement,
+                           simulate.RandomShooter, simulate.RandomShooter, rng,
+                           config, record=keep)
+        row = {'dimension': n, 'shots': len(keep.game.shots)}
+        for name, every in (('checkpoints', interval),
+                            ('from_start', len(keep.game.shots) + 1)):
+            replay = Replay(keep.game, config, every)
+            replay.seek(len(replay))
+            turns = [rng.randrange(len(replay) + 1) for i in range(seeks)]
+            times = []
+            for turn in turns:
+                begin = time.perf_counter()
+                if name == 'from_start':
+                    replay.seek(0)
+                replay.seek(turn)
+                times.append(time.perf_counter() - begin)
+            times.sort()
+            row[name + '_mean_us'] = 1e6 * sum(times) / len(times)
+            row[name + '_p99_us'] = 1e6 * times[int(0.99 * len(times))]
+        results.append(row)
+    return results
@@ -0,0 +1,275 @@
+'''
+Asyncio game server. Every connection hosts one BattleShip session played the
+same way as BattleShip.__main__: both players share the connection, player 1
+places their ships, then player 2, and then they take turns attacking, a turn
+lasting until the player misses.
+
+The protocol is one JSON object per line in each direction. Requests:
+
+    {"cmd": "place", "start": [x, y], "end": [x, y], "name": "carrier"}
+    {"cmd": "attack", "cell": [x, y]}
+    {"cmd": "personal_board"}
+    {"cmd": "opponent_board"}
+    {"cmd": "quit"}
+
+Every response has "ok"; failed requests have "ok": false and an "error"
+message, which for illegal placements and attacks is the message of the
+exception raised by PersonalBoard. Cells must be lists of two integers; a
+request with any other value is malformed.
+'''
+
+import asyncio
+import json
+
+from battleship import BattleShip
+from engine import DEFAULT_CONFIG, MISS
+
+#phases of a session
+PLACING = 'placing'
+PLAYING = 'playing'
+OVER = 'over'
+
+
+class Session(object):
+    '''
+    Session holds the state of the game of one connection and answers its
+    requests.
+    '''
+
+    def __init__(self, config = DEFAULT_CONFIG):
+        '''
+        Initializes a Session with the following instance variables:
+            self.game: the BattleShip object holding both PersonalBoards
+            self.phase: PLACING, PLAYING or OVER
+            self.player: the player placing ships or attacking, 1 or 2
+            self.winner: the winning player once the game is over
+        '''
+        self.game = BattleShip(config=config)
+        self.phase = PLACING
+        self.player = 1
+        self.winner = None
+
+    def board(self, player):
+        '''
+        Returns the PersonalBoard of player 1 or 2.
+        '''
+        return self.game.player1 if player == 1 else self.game.player2
+
+    def remaining(self):
+        '''
+        Returns the names of the ships the current player still has to place.
+        '''
+        placed = self.board(self.player).pieces
+        return [name for name in self.game.config.ships[1:] if name not in placed]
+
+    def handle(self, request):
+        '''
+        This method executes one request and returns the response.
+
+        Args:
+            request: dictionary decoded from a request line
+
+        Returns: dictionary
+        '''
+        cmd = request.get('cmd')
+        try:
+            if cmd == 'place':
+                return self.place(self.cell(request['start']),
+                                  self.cell(request['end']), request['name'])
+            if cmd == 'attack':
+                return self.attack(self.cell(request['cell']))
+            if cmd == 'personal_board':
+                return {'ok': True, 'player': self.player,
+                        'board': self.board(self.player).board}
+            if cmd == 'opponent_board':
+                board = self.board(3 - self.player).board
+                return {'ok': True, 'player': self.player,
+                        'board': [[val if val in ('M', 'H', 'S') else 0
+                                   for val in row] for row in board]}
+            if cmd == 'quit':
+                self.phase = OVER
+                return {'ok': True, 'result': 'Game over'}
+        except (IndexError, KeyError, TypeError, ValueError):
+            return {'ok': False, 'error': 'Malformed request.'}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': False, 'error': 'Unknown command.'}
+
+    def cell(self, value):
+        '''
+        This method checks a cell of a request before it reaches the board.
+
+        Args:
+            value: the decoded JSON value
+
+        Exceptions:
+            ValueError if value is not a list of two integers
+            if the cell is out of bounds
+
+        Returns: tuple with board coordinates
+        '''
+        if (not isinstance(value, list) or len(value) != 2 or
+                not all(type(coordinate) is int for coordinate in value)):
+            raise ValueError('Malformed cell.')
+        cell = tuple(value)
+        if not self.game.config.in_bounds(cell):
+            raise Exception('Entered numbers are out of bounds.')
+        return cell
+
+    def place(self, start, end, name):
+        '''
+        This method places a ship of the player placing ships, and passes on to
+        player 2, and then to the game, once the fleet is complete.
+
+        Exceptions:
+            if the game is not in the placing phase
+            if the ship has already been placed or the placement is illegal
+        '''
+        if self.phase != PLACING:
+            raise Exception('Ships have already been placed.')
+        board = self.board(self.player)
+        if name in board.pieces:
+            raise Exception('Ship already placed.')
+        board.place_piece(start, end, name)
+        player = self.player
+        if not self.remaining():
+            if self.player == 1:
+                self.player = 2
+            else:
+                self.player = 1
+                self.phase = PLAYING
+        return {'ok': True, 'player': player, 'phase': self.phase,
+                'next': self.player}
+
+    def attack(self, cell):
+        '''
+        This method attacks cell on the opponent's board of the current player,
+        following the turn rule of BattleShip.__main__.
+
+        Exceptions:
+            if the game is not in the playing phase
+            if the attack is illegal
+        '''
+        if self.phase != PLAYING:
+            raise Exception('The game is not being played.')
+        player = self.player
+        target = self.board(3 - player)
+        result = target.attack(cell)
+        if result.remaining == 0:
+            self.phase = OVER
+            self.winner = player
+        elif result.outcome == MISS:
+            self.player = 3 - player
+        response = {'ok': True, 'player': player, 'result': str(result),
+                    'next': self.player}
+        if self.winner:
+            response['winner'] = self.winner
+        return response
+
+
+class GameServer(object):
+    '''
+    GameServer accepts connections on a TCP port or a Unix socket and runs one
+    Session per connection. Each connection is read one line at a time and
+    every response is drained before the next request is read, so a client
+    that does not read its responses stops being served instead of filling
+    the server's memory. Connections that stay idle too long are closed.
+    '''
+
+    def __init__(self, config = DEFAULT_CONFIG, idle_timeout = 300.0,
+                 max_line = 4096):
+        '''
+        Args:
+            config: the GameConfig of the games
+            idle_timeout: seconds a connection may wait between requests
+            max_line: longest request line accepted, in bytes
+        '''
+        self.config = config
+        self.idle_timeout = idle_timeout
+        self.max_line = max_line
+        self.sessions = 0
+        self.server = None
+
+    async def start(self, host = '127.0.0.1', port = 0, path = None):
+        '''
+        Starts listening on host and port, or on the Unix socket path if it is
+        given. Port 0 picks a free port; see address.
+        '''
+        if path is not None:
+            self.server = await asyncio.start_unix_server(
+                self.serve, path, limit=self.max_line)
+        else:
+            self.server = await asyncio.start_server(
+                self.serve, host, port, limit=self.max_line, backlog=4096)
+        return self
+
+    def address(self):
+        '''
+        Returns the address the server listens on.
+        '''
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        '''
+        Stops accepting connections and waits for the listener to close.
+        '''
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def serve(self, reader, writer):
+        '''
+        Runs the session of one connection until the client quits, the game
+        is over, the connection is idle for too long or sends a bad line.
+        '''
+        session = Session(self.config)
+        self.sessions += 1
+        try:
+            while session.phase != OVER:
+                try:
+                    line = await asyncio.wait_for(reader.readline(),
+                                                  self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self.send(writer, {'ok': False, 'error': 'Idle timeout.'})
+                    break
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self.send(writer, {'ok': False,
+                                             'error': 'Request too long.'})
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    response = {'ok': False, 'error': 'Malformed request.'}
+                else:
+                    response = session.handle(request)
+                await self.send(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def send(self, writer, response):
+        '''
+        Writes one response line and waits until the transport buffer has
+        room again.
+        '''
+        writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+        await writer.drain()
+
+
+async def serve_forever(host = '127.0.0.1', port = 8765, path = None,
+                        config = DEFAULT_CONFIG, idle_timeout = 300.0):
+    '''
+    This function runs a GameServer until it is cancelled.
+    '''
+    server = await GameServer(config, idle_timeout).start(host, port, path)
+    async with server.server:
+        await server.server.serve_forever()
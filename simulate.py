@@ -0,0 +1,259 @@
+'''
+Non-interactive game simulation. A game is driven entirely by strategies:
+
+    placement strategy: a callable placer(rng, config) returning a list of
+                        (start, end, name) tuples, one per ship of the fleet
+                        of the GameConfig
+    firing strategy: a callable shooter(rng, config) returning an object with a
+                     next_shot() method that returns the cell to attack and a
+                     record(cell, result) method that receives the string
+                     returned by opponent_move
+
+Games follow the same rules as BattleShip.__main__: player 1 moves first and a
+player keeps shooting for as long as they hit or sink a ship.
+'''
+
+import random
+import time
+from collections import namedtuple
+
+from engine import DEFAULT_CONFIG, GameConfig, PersonalBoard
+from fleets import random_fleet
+
+#winner: 1 or 2; shots: number of shots fired by the winner; turns: number of
+#turns played by both players
+GameResult = namedtuple('GameResult', ['winner', 'shots', 'turns'])
+
+
+def random_placement(rng, config):
+    '''
+    This placement strategy puts every ship at a uniformly random position and
+    orientation among those that do not overlap the ships already placed (see
+    fleets.random_fleet).
+
+    Args:
+        rng: random.Random instance
+        config: the GameConfig of the game
+
+    Returns: list of (start, end, name) tuples
+    '''
+    return random_fleet(rng, config)
+
+
+class RandomShooter(object):
+    '''
+    Firing strategy that attacks every cell of the board once, in random order.
+    '''
+
+    def __init__(self, rng, config):
+        '''
+        Shuffles all the cells of the board with the given random.Random.
+        '''
+        self.cells = [(x, y) for x in range(config.rows) for y in range(config.cols)]
+        rng.shuffle(self.cells)
+
+    def next_shot(self):
+        '''
+        Returns the next cell to attack.
+        '''
+        return self.cells.pop()
+
+    def record(self, cell, result):
+        '''
+        Random shooting ignores the results of its attacks.
+        '''
+        pass
+
+
+class HuntShooter(RandomShooter):
+    '''
+    Firing strategy that shoots at random until it hits a ship and then
+    attacks the neighbours of every hit cell until the ship is sunk.
+    '''
+
+    def __init__(self, rng, config):
+        '''
+        Shuffles all the cells of the board and starts with no cells to target.
+        '''
+        super(HuntShooter, self).__init__(rng, config)
+        self.config = config
+        self.targets = []
+        self.fired = set()
+
+    def next_shot(self):
+        '''
+        Returns the next queued neighbour of a hit, or a random cell if there
+        is none.
+        '''
+        while self.targets:
+            cell = self.targets.pop()
+            if cell not in self.fired:
+                return cell
+        cell = self.cells.pop()
+        while cell in self.fired:
+            cell = self.cells.pop()
+        return cell
+
+    def record(self, cell, result):
+        '''
+        Queues the neighbours of a hit cell and forgets them once a ship sinks.
+        '''
+        self.fired.add(cell)
+        if result == 'hit':
+            x, y = cell
+            for near in ((x-1, y), (x+1, y), (x, y-1), (x, y+1)):
+                if self.config.in_bounds(near) and near not in self.fired:
+                    self.targets.append(near)
+        elif result != 'miss':
+            self.targets = []
+
+
+def play_game(placer1, placer2, shooter1, shooter2, rng, config = DEFAULT_CONFIG,
+              board = PersonalBoard, record = None):
+    '''
+    This function plays one game between two players without any user
+    interaction.
+
+    Args:
+        placer1, placer2: placement strategies of player 1 and player 2
+        shooter1, shooter2: firing strategies of player 1 and player 2
+        rng: random.Random instance shared by all the strategies
+        config: the GameConfig of the game
+        board: class of the board engine, PersonalBoard or BitBoard
+        record: optional records.GameWriter that the fleets and the shots of
+                the game are written to
+
+    Exceptions:
+        any exception raised by place_piece or opponent_move, e.g. when a
+        strategy places a ship illegally or attacks the same cell twice
+
+    Returns: GameResult
+    '''
+    boards = (board(config), board(config))
+    fleets = (placer1(rng, config), placer2(rng, config))
+    for player, fleet in zip(boards, fleets):
+        for start, end, name in fleet:
+            player.place_piece(start, end, name)
+    shooters = (shooter1(rng, config), shooter2(rng, config))
+    ships = config.ships
+    shots = [0, 0]
+    log = [] if record is not None else None
+
+    turn = 0 #even --> player 1, odd --> player 2
+    while True:
+        me = turn & 1
+        shooter = shooters[me]
+        target = boards[1 - me]
+        #a turn lasts until the player misses or wins
+        while True:
+            cell = shooter.next_shot()
+            result = target.opponent_move(cell, ships)
+            shooter.record(cell, result)
+            shots[me] += 1
+            if log is not None:
+                log.append((cell, result))
+            if result == 'miss':
+                break
+            if target.game_over():
+                if log is not None:
+                    record.write(me + 1, fleets, log)
+                return GameResult(me + 1, shots[me], turn + 1)
+        turn += 1
+
+
+def iter_games(n, placer1, placer2, shooter1, shooter2, seed = None,
+               config = DEFAULT_CONFIG, board = PersonalBoard, record = None):
+    '''
+    This generator plays n games with the same strategies and yields the
+    result of each one. All the games share one random.Random seeded with
+    seed, so a run is reproducible. If record is a records.GameWriter, every
+    game is written to it.
+
+    Returns: iterator of GameResult
+    '''
+    rng = random.Random(seed)
+    for i in range(n):
+        yield play_game(placer1, placer2, shooter1, shooter2, rng, config, board,
+                        record)
+
+
+def simulate(n, placer1, placer2, shooter1, shooter2, seed = None,
+             config = DEFAULT_CONFIG, board = PersonalBoard, record = None):
+    '''
+    This function plays n games (see iter_games) and returns all the results.
+
+    Returns: list of GameResult
+    '''
+    return list(iter_games(n, placer1, placer2, shooter1, shooter2, seed,
+                           config, board, record))
+
+
+def benchmark_shots(dimensions = (10, 25, 50, 100), board = PersonalBoard,
+                    fleet = None, seed = 0):
+    '''
+    This function measures the average latency of opponent_move on square
+    boards of growing size, attacking every cell of a board with a random
+    fleet in random order. The latency of PersonalBoard does not depend on
+    the board size; that of BitBoard grows on large boards, as its masks are
+    ints of one bit per cell and every shot makes new ones (on a 100x100
+    board, ints of 10000 bits).
+
+    Args:
+        dimensions: side lengths of the boards to measure
+        board: class of the board engine
+        fleet: list of (name, size) tuples, the standard fleet if not given
+        seed: seed of the random.Random
+
+    Returns: dictionary where keys are side lengths and values are the
+             average seconds per shot
+    '''
+    rng = random.Random(seed)
+    latency = {}
+    for side in dimensions:
+        config = GameConfig(side, side, fleet)
+        player = board(config)
+        for start, end, name in random_fleet(rng, config):
+            player.place_piece(start, end, name)
+        cells = [(x, y) for x in range(side) for y in range(side)]
+        rng.shuffle(cells)
+        ships = config.ships
+        begin = time.perf_counter()
+        for cell in cells:
+            player.opponent_move(cell, ships)
+        latency[side] = (time.perf_counter() - begin) / len(cells)
+    return latency
+
+
+def benchmark_memory(n = 1000, board = PersonalBoard, config = DEFAULT_CONFIG,
+                     seed = 0):
+    '''
+    This function measures with tracemalloc how many bytes the two boards of a
+    game take once both fleets are placed, averaged over n live games.
+
+    Args:
+        n: number of games kept alive at once
+        board: class of the board engine, e.g. bench.LegacyBoard for the
+               boards of the original engine
+        config: the GameConfig of the games
+        seed: seed of the random.Random used for the fleets
+
+    Returns: float, bytes per game
+    '''
+    import tracemalloc
+    rng = random.Random(seed)
+    fleets = [random_fleet(rng, config) for i in range(2 * n)]
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = []
+    for i in range(n):
+        players = (board(config), board(config))
+        for player, fleet in zip(players, fleets[2*i:2*i + 2]):
+            for start, end, name in fleet:
+                player.place_piece(start, end, name)
+        games.append(players)
+    used = tracemalloc.get_traced_memory()[0] - before
+    if not started:
+        tracemalloc.stop()
+    return used / n
@@ -0,0 +1,406 @@
+'''
+Exact endgame solver. From a board as the opponent sees it ('M', 'H' and 'S'
+marks) and the names of the ships still afloat, Solver lists every placement
+of those ships consistent with the marks, all equally likely, and searches the
+shots that minimize the expected number of shots needed to sink them all:
+
+    value(position) = 0 once every ship is sunk, else
+    min over cells of 1 + sum over outcomes of P(outcome) * value(next position)
+
+where the outcomes of a shot are a miss, a hit, or the sinking of one of the
+ships, as reported by opponent_move. A sunk ship has all its cells marked 'S',
+so a sinking also tells where the ship was. Only cells covered by some
+consistent placement are tried, from the most to the least likely to be hit.
+Every ship cell not hit yet costs a shot, and so does every miss before the
+next hit, which gives a lower bound of the value of a position; each position
+is searched with the value its parent needs it to beat, and a cell is dropped
+as soon as its expected value is known not to beat the best cell found.
+
+Positions are memoized in a TranspositionTable keyed by a Zobrist hash of the
+placements still possible and of the shot and hit cells they cover, evicting
+the least recently used entries beyond a memory cap. The search is meant for
+late games, with few ships afloat and most of the board marked, such as a ship
+that has been hit and must be finished off: positions with hundreds of
+placements left are out of reach of an exact search, and when the time budget
+runs out the best shot examined is returned instead.
+'''
+
+import random
+import time
+from collections import OrderedDict, namedtuple
+
+from engine import DEFAULT_CONFIG
+from placements import placement_index
+
+INFINITY = float('inf')
+
+#estimated bytes of one TranspositionTable entry, with its key and links
+ENTRY_BYTES = 320
+
+#cell: best shot; expected: expected number of shots to sink every ship,
+#starting with that one; exact: False if the time budget ran out, in which case
+#cell is the best of the shots examined; configurations: number of consistent
+#placements; nodes: number of positions searched
+Solution = namedtuple('Solution', ['cell', 'expected', 'exact',
+                                   'configurations', 'nodes'])
+
+
+class _Timeout(Exception):
+    pass
+
+
+class TranspositionTable(object):
+    '''
+    TranspositionTable maps position keys to their value and best shot,
+    dropping the least recently used positions once it holds the number of
+    entries that fit in its memory cap.
+    '''
+
+    def __init__(self, memory = 64 << 20):
+        '''
+        Args:
+            memory: memory cap in bytes
+        '''
+        self.capacity = max(1, memory // ENTRY_BYTES)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, shots, hits):
+        '''
+        Returns the (value, cell, exact) stored for the position, or None. The
+        shot and hit masks are compared too, so a hash collision is a miss.
+        '''
+        entry = self.entries.get(key)
+        if entry is None or entry[3] != shots or entry[4] != hits:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[:3]
+
+    def put(self, key, value, cell, exact, shots, hits):
+        '''
+        Stores the value and best shot of a position, or a lower bound of its
+        value if exact is False.
+        '''
+        self.entries[key] = (value, cell, exact, shots, hits)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class Solver(object):
+    '''
+    Solver finds optimal shots for positions of one GameConfig and keeps its
+    TranspositionTable between calls, so the positions following one another
+    in a game reuse each other's work.
+
+    The value of a position only depends on the placements still possible and
+    on which of the cells they cover have been shot, so positions are keyed by
+    the Zobrist hash of those placements and of the 'M' and 'H' marks on the
+    cells they cover: shots elsewhere and the order of the shots do not
+    matter.
+    '''
+
+    def __init__(self, config = DEFAULT_CONFIG, memory = 64 << 20, seed = 0):
+        '''
+        Args:
+            config: the GameConfig of the positions
+            memory: memory cap of the transposition table in bytes
+            seed: seed of the Zobrist keys
+        '''
+        self.config = config
+        self.table = TranspositionTable(memory)
+        rng = random.Random(seed)
+        cells = config.rows * config.cols
+        #keys of a cell marked 'M' and 'H'
+        self.cell_keys = [(rng.getrandbits(64), rng.getrandbits(64))
+                          for i in range(cells)]
+
+    def configurations(self, blocked, hits, ships, limit = 100000,
+                       deadline = None):
+        '''
+        This method lists the placements of ships that do not cover a blocked
+        cell, are not entirely hit, do not overlap and together cover every
+        hit cell.
+
+        Args:
+            blocked: bitmask of the cells no ship afloat can cover
+            hits: bitmask of the cells that must be covered
+            ships: list of (name, size) tuples
+            limit: largest number of placements accepted
+            deadline: time.perf_counter() value after which the search stops,
+                      no limit if None
+
+        Exceptions:
+            if there are more than limit placements
+            _Timeout if the deadline has passed
+
+        Returns: list of tuples of ship bitmasks, in the order of ships
+        '''
+        rows, cols = self.config.rows, self.config.cols
+        #a ship afloat has at least one cell that has not been hit
+        candidates = [[mask for mask in placement_index(size, rows, cols).masks
+                       if not mask & blocked and mask & ~hits]
+                      for name, size in ships]
+        #room left for the hit cells still uncovered after ship i is placed
+        room = [sum(size for name, size in ships[i:])
+                for i in range(len(ships) + 1)]
+        found = []
+        chosen = []
+        clock = time.perf_counter
+
+        def place(i, used):
+            if bin(hits & ~used).count('1') > room[i]:
+                return
+            if i == len(ships):
+                found.append(tuple(chosen))
+                if len(found) > limit:
+                    raise Exception('Too many consistent configurations.')
+                return
+            #the clock is read before every loop over the placements of a
+            #ship, not at the complete configurations, which are most calls
+            if deadline is not None and clock() > deadline:
+                raise _Timeout()
+            for mask in candidates[i]:
+                if not mask & used:
+                    chosen.append(mask)
+                    place(i + 1, used | mask)
+                    chosen.pop()
+
+        place(0, 0)
+        return found
+
+    def solve(self, board, afloat, budget = 1.0, limit = 100000):
+        '''
+        This method finds the shot that minimizes the expected number of shots
+        needed to sink the ships afloat.
+
+        Args:
+            board: a matrix as in PersonalBoard.board; only the 'M', 'H' and
+                   'S' marks are read, so ship positions are not revealed
+            afloat: names of the ships that have not been sunk
+            budget: seconds the search may take
+            limit: largest number of consistent placements accepted
+
+        Exceptions:
+            if no ship is afloat
+            if no placement of the ships afloat is consistent with the board
+            if there are more than limit consistent placements
+
+        Returns: Solution
+        '''
+        if not afloat:
+            raise Exception('No ship is afloat.')
+        config = self.config
+        cols = config.cols
+        blocked = hits = 0
+        for x, row in enumerate(board):
+            for y, val in enumerate(row):
+                if val in ('M', 'S'):
+                    blocked |= 1 << (x*cols + y)
+                elif val == 'H':
+                    hits |= 1 << (x*cols + y)
+        ships = [(name, config.types[name][1]) for name in afloat]
+        self.nodes = 0
+        self.deadline = time.perf_counter() + budget
+        try:
+            configs = self.configurations(blocked, hits, ships, limit,
+                                          self.deadline)
+        except _Timeout:
+            #the placements could not even be listed
+            return Solution(divmod(self._likely(blocked, hits, ships), cols),
+                            None, False, 0, 0)
+        if not configs:
+            raise Exception('No fleet is consistent with the board.')
+
+        #for every configuration: the ships as bitmasks, the index of the ship
+        #covering each cell, all the cells covered and its Zobrist key
+        self.configs = configs
+        self.owners = []
+        self.unions = []
+        self.keys = []
+        for masks in configs:
+            self.owners.append(dict((cell, i) for i, mask in enumerate(masks)
+                                    for cell in _cells(mask)))
+            self.unions.append(sum(masks))
+            self.keys.append(_mix(hash(tuple(sorted(zip(afloat, masks))))))
+        self.total = sum(size for name, size in ships)
+        self.progress = None
+        group = list(range(len(configs)))
+        try:
+            value, cell, exact = self._value(group, blocked | hits, hits,
+                                             root=True)
+            exact = True
+        except _Timeout:
+            exact = False
+            if self.progress is None:
+                #nothing finished: fire at the most likely cell
+                value, cell = None, self._order(group, blocked | hits)[0][1]
+            else:
+                value, cell = self.progress
+        return Solution(divmod(cell, cols), value, exact, len(configs),
+                        self.nodes)
+
+    def _likely(self, blocked, hits, ships):
+        '''
+        Returns the cell not shot covered by the most placements of single
+        ships, counting only the placements that cover a hit cell if there
+        are any: the shot to fire when the configurations are not known.
+        '''
+        rows, cols = self.config.rows, self.config.cols
+        counts = {}
+        for name, size in ships:
+            for mask in placement_index(size, rows, cols).masks:
+                if mask & blocked or not mask & ~hits:
+                    continue
+                if hits and not mask & hits:
+                    continue
+                for cell in _cells(mask & ~hits):
+                    counts[cell] = counts.get(cell, 0) + 1
+        if not counts:
+            raise Exception('No fleet is consistent with the board.')
+        return min(counts, key=lambda cell: (-counts[cell], cell))
+
+    def _order(self, group, shots):
+        '''
+        Returns the (count, cell) pairs of the cells not shot covered by the
+        configurations of group, from the most covered.
+        '''
+        counts = {}
+        for c in group:
+            for cell in self.owners[c]:
+                if not shots >> cell & 1:
+                    counts[cell] = counts.get(cell, 0) + 1
+        return sorted(((n, cell) for cell, n in counts.items()),
+                      key=lambda item: (-item[0], item[1]))
+
+    def _value(self, group, shots, hits, limit = INFINITY, root = False):
+        '''
+        Returns the expected number of shots needed to sink the ships afloat
+        and the best cell, for the position reached by shots and hits, in which
+        the configurations of group are still possible. The search stops as
+        soon as the value is known to be at least limit, and then returns a
+        lower bound.
+
+        Returns: tuple (value, cell, exact), where cell is None and exact False
+                 if value is only a lower bound, not smaller than limit
+        '''
+        if len(group) == 1:
+            #the ships are known: every cell left is a hit
+            left = self.unions[group[0]] & ~shots
+            if not left:
+                return 0.0, None, True
+            return float(bin(left).count('1')), _cells(left)[0], True
+
+        cover = 0
+        key = 0
+        for c in group:
+            cover |= self.unions[c]
+            key ^= self.keys[c]
+        if not cover & ~shots:
+            return 0.0, None, True
+        marked = shots & cover
+        for cell in _cells(marked):
+            key ^= self.cell_keys[cell][hits >> cell & 1]
+        entry = self.table.get(key, marked, hits)
+        if entry is not None and (entry[2] or entry[0] >= limit):
+            return entry
+        #a node costs a sort of the cells of its configurations, against which
+        #reading the clock is negligible
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+        configs = self.configs
+        total = len(group)
+        order = self._order(group, shots)
+        #each ship cell not hit costs a shot, and so does every miss before
+        #the next hit: whatever the cells shot, the first k shots all miss
+        #with probability at least 1 - (sum of the k largest counts) / total
+        bound = self.total - bin(hits).count('1')
+        lower = bound
+        covered = 0
+        for count, cell in order:
+            covered += count
+            if covered >= total:
+                break
+            lower += 1 - covered / total
+        if lower >= limit:
+            return lower, None, False
+
+        best, best_cell = INFINITY, None
+        for count, cell in order:
+            cutoff = min(best, limit)
+            #this cell hits with probability count / total
+            expected = 1 + bound - count / total
+            if expected >= cutoff:
+                break
+            bit = 1 << cell
+            #a sinking names the ship and marks all its cells 'S', so it
+            #reveals where the ship was: configurations where the same ship
+            #sinks in different places lead to different positions
+            outcomes = {}
+            for c in group:
+                i = self.owners[c].get(cell)
+                if i is None:
+                    outcome = -1
+                elif configs[c][i] & ~(hits | bit):
+                    outcome = -2
+                else:
+                    outcome = (i, configs[c][i])
+                outcomes.setdefault(outcome, []).append(c)
+            exact = True
+            for outcome, members in outcomes.items():
+                p = len(members) / total
+                if outcome == -1:
+                    low = bound
+                    child = (members, shots | bit, hits)
+                else:
+                    low = bound - 1
+                    child = (members, shots | bit, hits | bit)
+                #the value of the child that would take this cell to cutoff
+                value, move, exact = self._value(
+                    *child, limit=low + (cutoff - expected) / p)
+                expected += p * (value - low)
+                if not exact or expected >= cutoff:
+                    exact = False
+                    break
+            if exact and expected < best:
+                best, best_cell = expected, cell
+                if root:
+                    self.progress = (best, best_cell)
+        if best < limit:
+            self.table.put(key, best, best_cell, True, marked, hits)
+            return best, best_cell, True
+        self.table.put(key, limit, None, False, marked, hits)
+        return limit, None, False
+
+
+def _mix(value):
+    '''
+    Returns a 64-bit key of value, scrambled with the splitmix64 finalizer so
+    that the keys of similar values share no structure when xored together.
+    '''
+    value &= (1 << 64) - 1
+    value = (value ^ value >> 30) * 0xbf58476d1ce4e5b9 & (1 << 64) - 1
+    value = (value ^ value >> 27) * 0x94d049bb133111eb & (1 << 64) - 1
+    return value ^ value >> 31
+
+
+def _cells(mask):
+    '''
+    Returns the indices of the set bits of mask.
+    '''
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
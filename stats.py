@@ -0,0 +1,407 @@
+'''
+Shot and placement statistics over many games. ShotStats counts, for every
+cell of the board, how often it was shot, how often the shot hit a ship (a hit
+or a sinking) and how often it was the first hit on its board, and for every
+type of ship how often it covered the cell. Games are fed as they are played,
+from the fleets and the results of opponent_move:
+
+    stats.add_fleet(fleet)
+    stats.add_shots(shots)
+
+or as whole games through write, which has the signature of
+records.GameWriter.write, so a ShotStats can be passed as the record of
+simulate.play_game or fed the games of a records.GameReader.
+
+The counts are kept in NumPy arrays of int64. The cells of the games are
+buffered in lists and added to the arrays with one bincount per chunk of
+cells, so the memory used does not grow with the number of games. The
+ShotStats of worker processes are combined with merge (see collect), and
+heatmap turns the counts into a matrix of levels that BattleShip.print_board
+or render.BoardRenderer can display.
+'''
+
+import os
+import time
+
+import numpy as np
+
+import records
+from engine import DEFAULT_CONFIG, MISS
+
+#results of a missed shot: the string of opponent_move and the outcome of a
+#record file
+_MISSES = (MISS, records.MISS)
+
+#counts a heatmap can show
+KINDS = ('shots', 'hits', 'first_hits', 'placements')
+
+
+class ShotStats(object):
+    '''
+    ShotStats accumulates the statistics of the games of one GameConfig:
+        self.boards: number of boards whose shots were added
+        self.fleets: number of fleets added
+        self.shots: rows x cols array of the number of shots at every cell
+        self.hits: rows x cols array of the number of shots at every cell that
+                   hit or sank a ship
+        self.first_hits: rows x cols array of the number of boards whose first
+                         hit was at every cell
+        self.placements: ships x rows x cols array of the number of fleets
+                         where the ship, in the order of the fleet of the
+                         GameConfig, covered every cell
+
+    Games added since the last call of flush are still buffered; heatmap,
+    merge and snapshot flush first.
+    '''
+
+    def __init__(self, config = DEFAULT_CONFIG, chunk = 1 << 16):
+        '''
+        Args:
+            config: the GameConfig of the games
+            chunk: number of buffered cells that triggers a flush
+        '''
+        self.config = config
+        self.chunk = chunk
+        rows, cols = config.rows, config.cols
+        self.boards = 0
+        self.fleets = 0
+        self.shots = np.zeros((rows, cols), dtype=np.int64)
+        self.hits = np.zeros((rows, cols), dtype=np.int64)
+        self.first_hits = np.zeros((rows, cols), dtype=np.int64)
+        self.placements = np.zeros((len(config.fleet), rows, cols),
+                                   dtype=np.int64)
+        #cell numbers x*cols + y waiting to be counted; placements are
+        #numbered ship*rows*cols + cell
+        self._shots = []
+        self._hits = []
+        self._first_hits = []
+        self._placements = []
+        #index of every ship in the fleet of the GameConfig
+        self._order = dict((name, i) for i, (name, size)
+                           in enumerate(config.fleet))
+
+    def add_fleet(self, fleet):
+        '''
+        This method counts the cells covered by the ships of a fleet.
+
+        Args:
+            fleet: list of (start, end, name) tuples
+
+        Exceptions:
+            if a ship is not in the fleet of the GameConfig
+        '''
+        cols = self.config.cols
+        base = self.config.rows * cols
+        buffer = self._placements
+        for (x0, y0), (x1, y1), name in fleet:
+            if name not in self._order:
+                raise Exception('Unknown type of ship.')
+            offset = self._order[name] * base
+            if x0 == x1:
+                first = offset + x0*cols
+                buffer.extend(range(first + min(y0, y1),
+                                    first + max(y0, y1) + 1))
+            else:
+                first = offset + y0
+                buffer.extend(range(first + min(x0, x1)*cols,
+                                    first + (max(x0, x1) + 1)*cols, cols))
+        self.fleets += 1
+        if len(buffer) >= self.chunk:
+            self.flush()
+
+    def add_shots(self, shots):
+        '''
+        This method counts the shots fired at one board.
+
+        Args:
+            shots: list of (cell, result) tuples in the order the shots were
+                   fired, where result is the string returned by
+                   opponent_move or an outcome of records
+        '''
+        cols = self.config.cols
+        first = True
+        for (x, y), result in shots:
+            cell = x*cols + y
+            self._shots.append(cell)
+            if result not in _MISSES:
+                self._hits.append(cell)
+                if first:
+                    self._first_hits.append(cell)
+                    first = False
+        self.boards += 1
+        if len(self._shots) >= self.chunk:
+            self.flush()
+
+    def write(self, winner, fleets, shots):
+        '''
+        This method adds one game, given like records.GameWriter.write takes
+        it: the two fleets, and the shots of both players in the order they
+        were fired. Player 1 fires first and the turn passes on every miss.
+
+        Args:
+            winner: 1 or 2, unused
+            fleets: the fleets of player 1 and player 2 as lists of
+                    (start, end, name) tuples
+            shots: list of (cell, result) tuples
+        '''
+        #shots at the board of player 2, then at the board of player 1
+        boards = ([], [])
+        player = 0
+        for shot in shots:
+            boards[player].append(shot)
+            if shot[1] in _MISSES:
+                player = 1 - player
+        for fleet in fleets:
+            self.add_fleet(fleet)
+        for board in boards:
+            self.add_shots(board)
+
+    def flush(self):
+        '''
+        This method adds the buffered cells to the arrays.
+        '''
+        for array, buffer in ((self.shots, self._shots),
+                              (self.hits, self._hits),
+                              (self.first_hits, self._first_hits),
+                              (self.placements, self._placements)):
+            if buffer:
+                counts = np.bincount(buffer, minlength=array.size)
+                array += counts.reshape(array.shape)
+                del buffer[:]
+
+    def merge(self, other):
+        '''
+        Adds the statistics of another ShotStats, e.g. of a worker process.
+
+        Exceptions:
+            if other is for another GameConfig
+        '''
+        if (other.config.rows, other.config.cols, other.config.fleet) != \
+           (self.config.rows, self.config.cols, self.config.fleet):
+            raise Exception('Statistics are for another game configuration.')
+        self.flush()
+        other.flush()
+        self.boards += other.boards
+        self.fleets += other.fleets
+        self.shots += other.shots
+        self.hits += other.hits
+        self.first_hits += other.first_hits
+        self.placements += other.placements
+
+    def counts(self, kind = 'shots', ship = None):
+        '''
+        This method returns the counts of one kind.
+
+        Args:
+            kind: one of KINDS
+            ship: for 'placements', the name of the ship, or None for all the
+                  ships together
+
+        Exceptions:
+            if the kind or the ship is unknown
+
+        Returns: rows x cols int64 array
+        '''
+        if kind not in KINDS:
+            raise Exception('Unknown kind of statistics: ' + kind + '.')
+        self.flush()
+        if kind != 'placements':
+            return getattr(self, kind).copy()
+        if ship is None:
+            return self.placements.sum(axis=0)
+        if ship not in self._order:
+            raise Exception('Unknown type of ship.')
+        return self.placements[self._order[ship]].copy()
+
+    def frequency(self, kind = 'shots', ship = None):
+        '''
+        This method returns the counts of one kind per board, or per fleet for
+        placements: the probability that a cell was shot, hit, first hit or
+        covered by the ship in a game.
+
+        Returns: rows x cols float array
+        '''
+        total = self.fleets if kind == 'placements' else self.boards
+        return self.counts(kind, ship) / max(total, 1)
+
+    def hit_rate(self):
+        '''
+        Returns the fraction of the shots at every cell that hit a ship, 0
+        where no shot was fired, as a rows x cols float array.
+        '''
+        self.flush()
+        return self.hits / np.maximum(self.shots, 1)
+
+    def heatmap(self, kind = 'shots', ship = None, levels = 10):
+        '''
+        This method scales the counts of one kind to levels from 0 to
+        levels - 1, the cells with the largest count getting the highest level,
+        so that every cell prints as one digit.
+
+        Args:
+            kind: one of KINDS
+            ship: for 'placements', the name of the ship, or None for all the
+                  ships together
+            levels: number of levels
+
+        Returns: matrix (list of lists) of ints, as taken by print_board
+        '''
+        counts = self.counts(kind, ship)
+        top = counts.max()
+        if top == 0:
+            return counts.tolist()
+        return (counts * (levels - 1) // top).tolist()
+
+    def show(self, kind = 'shots', ship = None):
+        '''
+        Prints the heatmap of one kind with BattleShip.print_board.
+        '''
+        from battleship import BattleShip
+        title = kind if ship is None else kind + ': ' + ship
+        print(title + ' (' + str(self.boards) + ' boards, ' +
+              str(self.fleets) + ' fleets)')
+        BattleShip(config=self.config).print_board(self.heatmap(kind, ship))
+
+    def snapshot(self):
+        '''
+        Returns: dictionary with the numbers of boards and fleets and the
+                 counts as lists, the placements keyed by ship name
+        '''
+        self.flush()
+        return {'boards': self.boards,
+                'fleets': self.fleets,
+                'shots': self.shots.tolist(),
+                'hits': self.hits.tolist(),
+                'first_hits': self.first_hits.tolist(),
+                'placements': dict((name, self.placements[i].tolist())
+                                   for name, i in self._order.items())}
+
+
+class _Keep(object):
+    '''
+    Stand-in for a GameWriter that keeps every game written.
+    '''
+
+    def __init__(self):
+        self.games = []
+
+    def write(self, winner, fleets, shots):
+        self.games.append((winner, fleets, shots))
+
+
+def run_shard(job):
+    '''
+    This function plays one shard of games in a worker process and returns
+    their statistics.
+
+    Args:
+        job: tuple (placement strategy, firing strategy, number of games,
+             seed, board class, GameConfig)
+
+    Returns: tuple (ShotStats, seconds spent)
+    '''
+    from simulate import simulate
+    placer, shooter, games, seed, board, config = job
+    stats = ShotStats(config)
+    begin = time.perf_counter()
+    simulate(games, placer, placer, shooter, shooter, seed, config, board, stats)
+    stats.flush()
+    return stats, time.perf_counter() - begin
+
+
+def shard_seeds(seed, shards):
+    '''
+    This function spawns the seeds of the shards of a collection from its
+    seed with numpy.random.SeedSequence, so that the random streams of the
+    shards are independent and do not overlap those of another seed, as
+    seed + shard would for neighbouring seeds.
+
+    Returns: list of ints
+    '''
+    return [int(child.generate_state(1, np.uint64)[0])
+            for child in np.random.SeedSequence(seed).spawn(shards)]
+
+
+def collect(placer, shooter, games, workers = None, chunk = 1000, seed = 0,
+            board = None, config = DEFAULT_CONFIG):
+    '''
+    This function plays games of one strategy against itself on a process
+    pool and merges the statistics of the shards as they come back.
+
+    Args:
+        placer: placement strategy of both players
+        shooter: firing strategy of both players; strategies must be
+                 picklable, e.g. module level functions and classes
+        games: number of games
+        workers: number of worker processes, defaults to the number of cores
+        chunk: number of games per shard
+        seed: seed of the collection, from which the seeds of the shards are
+              spawned (see shard_seeds)
+        board: class of the board engine, PersonalBoard by default
+        config: the GameConfig of the games
+
+    Returns: tuple (ShotStats, games/sec)
+    '''
+    import multiprocessing
+    from engine import PersonalBoard
+    board = board or PersonalBoard
+    starts = range(0, games, chunk)
+    seeds = shard_seeds(seed, len(starts))
+    jobs = [(placer, shooter, min(chunk, games - start), shard_seed, board,
+             config)
+            for start, shard_seed in zip(starts, seeds)]
+    stats = ShotStats(config)
+    begin = time.perf_counter()
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        for shard, spent in pool.imap_unordered(run_shard, jobs):
+            stats.merge(shard)
+    wall = time.perf_counter() - begin
+    return stats, games / wall if wall > 0 else 0.0
+
+
+def benchmark(games = 2000, seed = 0):
+    '''
+    This function compares the games per second that ShotStats.write counts
+    with the same counts made by adding 1 to a NumPy array for every cell,
+    on the games of a simulation of hunt/target shooters recorded in memory.
+
+    Returns: dictionary with the games/sec of both ways
+    '''
+    import simulate
+    keep = _Keep()
+    simulate.simulate(games, simulate.random_placement,
+                      simulate.random_placement, simulate.HuntShooter,
+                      simulate.HuntShooter, seed, record=keep)
+    config = DEFAULT_CONFIG
+
+    stats = ShotStats(config)
+    begin = time.perf_counter()
+    for game in keep.games:
+        stats.write(*game)
+    stats.flush()
+    buffered = games / (time.perf_counter() - begin)
+
+    shots = np.zeros((config.rows, config.cols), dtype=np.int64)
+    hits = np.zeros_like(shots)
+    first_hits = np.zeros_like(shots)
+    placements = np.zeros((len(config.fleet),) + shots.shape, dtype=np.int64)
+    order = dict((name, i) for i, (name, size) in enumerate(config.fleet))
+    begin = time.perf_counter()
+    for winner, fleets, log in keep.games:
+        for fleet in fleets:
+            for (x0, y0), (x1, y1), name in fleet:
+                placements[order[name], min(x0, x1):max(x0, x1) + 1,
+                           min(y0, y1):max(y0, y1) + 1] += 1
+        found = [False, False]
+        player = 0
+        for (x, y), result in log:
+            shots[x, y] += 1
+            if result == MISS:
+                player = 1 - player
+            else:
+                hits[x, y] += 1
+                if not found[player]:
+                    first_hits[x, y] += 1
+                    found[player] = True
+    single = games / (time.perf_counter() - begin)
+    return {'per_cell': single, 'buffered': buffered}
@@ -0,0 +1,112 @@
+'''
+Parity of BitBoard with PersonalBoard: random fleets, with illegal placements
+among them, are placed on both engines, and every cell is attacked in random
+order.
+'''
+
+import random
+
+import pytest
+
+from bitboard import BitBoard
+from engine import DEFAULT_CONFIG, PersonalBoard
+
+
+def _outcome(function, *args):
+    '''
+    Returns ('ok', result) or ('error', message) for a call.
+    '''
+    try:
+        return ('ok', function(*args))
+    except Exception as e:
+        return ('error', str(e))
+
+
+def _random_ends(rng, size, config):
+    '''
+    Returns the ends of a ship that may be out of bounds, diagonal or of the
+    wrong size.
+    '''
+    x = rng.randrange(-1, config.rows + 1)
+    y = rng.randrange(-1, config.cols + 1)
+    length = size - 1 + rng.choice((0, 0, 0, 0, -1, 1))
+    kind = rng.random()
+    if kind < 0.45:
+        return (x, y), (x, y + length)
+    if kind < 0.9:
+        return (x, y), (x + length, y)
+    return (x, y), (x + length, y + length)
+
+
+def _place(rng, boards, config):
+    '''
+    Places the fleet of config on every board, comparing the outcome of every
+    attempt, until every ship is placed.
+    '''
+    for name, size in config.fleet:
+        while True:
+            start, end = _random_ends(rng, size, config)
+            outcomes = [_outcome(board.place_piece, start, end, name)
+                        for board in boards]
+            assert outcomes[0] == outcomes[1], (start, end, name)
+            if outcomes[0][0] == 'ok':
+                break
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_parity(seed):
+    rng = random.Random(seed)
+    config = DEFAULT_CONFIG
+    ships = config.ships
+    cells = [(x, y) for x in range(config.rows) for y in range(config.cols)]
+    for game in range(60):
+        boards = (PersonalBoard(config), BitBoard(config))
+        _place(rng, boards, config)
+        assert boards[0].board == boards[1].board
+        rng.shuffle(cells)
+        for cell in cells:
+            results = [_outcome(board.opponent_move, cell, ships)
+                       for board in boards]
+            assert results[0] == results[1], cell
+            assert boards[0].board == boards[1].board
+            assert boards[0].game_over() == boards[1].game_over()
+        assert boards[0].game_over()
+        #attacks of a cell already attacked and out of the board
+        for cell in (cells[0], (-1, 0), (0, config.cols)):
+            assert (_outcome(boards[0].opponent_move, cell) ==
+                    _outcome(boards[1].opponent_move, cell))
+
+
+def test_parity_custom_config():
+    from engine import GameConfig
+    rng = random.Random(7)
+    config = GameConfig(6, 8, [('raft', 1), ('skiff', 3), ('barge', 6)])
+    cells = [(x, y) for x in range(config.rows) for y in range(config.cols)]
+    for game in range(100):
+        boards = (PersonalBoard(config), BitBoard(config))
+        _place(rng, boards, config)
+        rng.shuffle(cells)
+        for cell in cells:
+            results = [board.opponent_move(cell) for board in boards]
+            assert results[0] == results[1], cell
+            assert boards[0].board == boards[1].board
+            assert boards[0].game_over() == boards[1].game_over()
+
+
+def test_large_fleet():
+    from engine import GameConfig
+    #300 two-cell ships, 33 to a row of a 100x100 board
+    fleet = [('ship%d' % i, 2) for i in range(300)]
+    config = GameConfig(100, 100, fleet)
+    boards = (PersonalBoard(config), BitBoard(config))
+    ends = [((i // 33, 3*(i % 33)), (i // 33, 3*(i % 33) + 1), name)
+            for i, (name, size) in enumerate(fleet)]
+    for board in boards:
+        for start, end, name in ends:
+            board.place_piece(start, end, name)
+    assert boards[1].ids[3*(299 % 33) + 100*(299 // 33)] == 300
+    for start, end, name in ends:
+        for board in boards:
+            assert board.opponent_move(start) == 'hit'
+            assert board.opponent_move(end) == 'sunk: ' + name
+    assert boards[0].game_over() and boards[1].game_over()
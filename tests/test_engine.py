@@ -0,0 +1,99 @@
+'''
+Tests of the Piece hierarchy and of PersonalBoard.
+'''
+
+import pytest
+
+from engine import PIECES, Carrier, Piece
+
+
+def test_standard_pieces():
+    for name, cls in PIECES.items():
+        piece = cls((2, 1), (2, cls.SIZE))
+        assert type(piece) is cls
+        assert (piece.name, piece.size) == (name, cls.SIZE)
+        assert piece.cells() == [(2, y) for y in range(1, cls.SIZE + 1)]
+
+
+def test_explicit_size():
+    piece = Piece((0, 0), (0, 2), 3)
+    assert piece.size == 3
+    assert piece.cells() == [(0, 0), (0, 1), (0, 2)]
+    carrier = Carrier((0, 0), (3, 0), 4)
+    assert type(carrier) is Carrier
+    assert (carrier.name, carrier.ID, carrier.size) == ('carrier', 5, 4)
+    for cell in carrier.cells():
+        assert not carrier.is_sunk()
+        carrier.hit(cell)
+    assert carrier.is_sunk()
+    assert Carrier.SIZE == 5
+    assert Carrier((0, 0), (0, 4)).size == 5
+
+
+def test_pickle():
+    import pickle
+    carrier = Carrier((1, 0), (4, 0), 4)
+    carrier.hit((2, 0))
+    copy = pickle.loads(pickle.dumps(carrier))
+    assert type(copy) is Carrier
+    assert (copy.start, copy.end, copy.size, copy.hits) == \
+        ((1, 0), (4, 0), 4, carrier.hits)
+
+
+def test_occupied_cells_read_only():
+    carrier = Carrier((0, 0), (0, 4))
+    carrier.hit((0, 1))
+    cells = carrier.occupied_cells
+    assert dict(cells) == {(0, 0): 0, (0, 1): 'H', (0, 2): 0, (0, 3): 0,
+                           (0, 4): 0}
+    with pytest.raises(TypeError):
+        cells[(0, 2)] = 'H'
+    assert carrier.occupied_cells[(0, 2)] == 0
+
+
+@pytest.mark.parametrize('start, end, size, message', [
+    ((0, 0), (0, 3), 3, 'Invalid piece size.'),
+    ((0, 0), (1, 1), 2, 'Invalid arrangement of the piece.'),
+    ((0, 0), (0, 3), None, 'Invalid piece size.')])
+def test_invalid_pieces(start, end, size, message):
+    cls = Carrier if size is None else Piece
+    with pytest.raises(Exception) as info:
+        cls(start, end, size)
+    assert str(info.value) == message
+
+
+def test_make_unmake_move():
+    import copy
+    import random
+    from bitboard import BitBoard
+    from engine import DEFAULT_CONFIG, PersonalBoard
+    from simulate import random_placement
+    rng = random.Random(4)
+    cells = [(x, y) for x in range(10) for y in range(10)]
+    for game in range(50):
+        board, bits = PersonalBoard(), BitBoard()
+        for start, end, name in random_placement(rng, DEFAULT_CONFIG):
+            board.place_piece(start, end, name)
+            bits.place_piece(start, end, name)
+        rng.shuffle(cells)
+        states = []
+        for cell in cells:
+            states.append((copy.deepcopy(board.board), board.sunk_ships,
+                           dict((name, piece.hits)
+                                for name, piece in board.pieces.items())))
+            assert board.make_move(cell) == bits.opponent_move(cell)
+        assert board.game_over()
+        for cell in reversed(cells):
+            board.unmake_move()
+            assert (board.board, board.sunk_ships,
+                    dict((name, piece.hits)
+                         for name, piece in board.pieces.items())) == \
+                states.pop()
+        marker = board.snapshot()
+        for cell in cells[:50]:
+            board.make_move(cell)
+        board.restore(marker)
+        assert board.sunk_ships == 0 and not board.history
+        with pytest.raises(Exception) as info:
+            board.unmake_move()
+        assert str(info.value) == 'No move to undo.'
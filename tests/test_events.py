@@ -0,0 +1,98 @@
+'''
+Events of the boards: the callbacks subscribed to the outcomes of attacks are
+called in the order the shots are fired, and the string fast path of
+opponent_move builds no ShotResult while nothing is subscribed.
+'''
+
+import pytest
+
+import engine
+from engine import HIT, MISS, SUNK, GameConfig, PersonalBoard, ShotResult
+
+#two ships in the first row: a destroyer at (0, 0)-(0, 1) and a cruiser at
+#(0, 3)-(0, 4)
+CONFIG = GameConfig(3, 5, [('destroyer', 2), ('cruiser', 2)])
+
+
+def _board():
+    board = PersonalBoard(CONFIG)
+    board.place_piece((0, 0), (0, 1), 'destroyer')
+    board.place_piece((0, 3), (0, 4), 'cruiser')
+    return board
+
+
+def test_event_order():
+    board = _board()
+    events = []
+    for event in (MISS, HIT, SUNK, 'game_over'):
+        board.subscribe(event, lambda result, event = event:
+                        events.append((event, result)))
+    shots = [(1, 1), (0, 0), (0, 1), (0, 3), (2, 2), (0, 4)]
+    results = [board.opponent_move(cell) for cell in shots]
+    assert results == ['miss', 'hit', 'sunk: destroyer', 'hit', 'miss',
+                       'sunk: cruiser']
+    assert events == [
+        (MISS, ShotResult(MISS, (1, 1), 0, '', 2)),
+        (HIT, ShotResult(HIT, (0, 0), 1, 'destroyer', 2)),
+        (SUNK, ShotResult(SUNK, (0, 1), 1, 'destroyer', 1)),
+        (HIT, ShotResult(HIT, (0, 3), 2, 'cruiser', 1)),
+        (MISS, ShotResult(MISS, (2, 2), 0, '', 1)),
+        (SUNK, ShotResult(SUNK, (0, 4), 2, 'cruiser', 0)),
+        ('game_over', ShotResult(SUNK, (0, 4), 2, 'cruiser', 0))]
+
+
+def test_attack_matches_opponent_move():
+    board = _board()
+    other = _board()
+    seen = []
+    board.subscribe(HIT, seen.append)
+    for cell in [(1, 1), (0, 0), (0, 1), (0, 3), (0, 4)]:
+        result = board.attack(cell)
+        assert str(result) == other.opponent_move(cell)
+        assert result.remaining == len(other.pieces) - other.sunk_ships
+    assert seen == [ShotResult(HIT, (0, 0), 1, 'destroyer', 2),
+                    ShotResult(HIT, (0, 3), 2, 'cruiser', 1)]
+    with pytest.raises(Exception, match='Already attacked that square.'):
+        board.attack((0, 0))
+    with pytest.raises(Exception, match='Entered numbers are out of bounds.'):
+        board.attack((3, 0))
+
+
+def test_unsubscribe():
+    board = _board()
+    seen = []
+    #nothing subscribed yet, or not to this event
+    board.unsubscribe(MISS, seen.append)
+    board.subscribe(HIT, seen.append)
+    board.unsubscribe(MISS, seen.append)
+    board.unsubscribe(HIT, seen.append)
+    board.unsubscribe(HIT, seen.append)
+    board.opponent_move((0, 0))
+    assert seen == []
+
+
+def test_no_result_without_listeners(monkeypatch):
+    def fail(*args):
+        raise AssertionError('ShotResult built')
+    board = _board()
+    monkeypatch.setattr(engine, 'ShotResult', fail)
+    for cell in [(1, 1), (0, 0), (0, 1), (0, 3), (0, 4)]:
+        board.opponent_move(cell)
+    board.make_move((2, 2))
+    assert board.game_over()
+
+
+def test_bitboard_events():
+    from bitboard import BitBoard
+    boards = (_board(), BitBoard(CONFIG))
+    boards[1].place_piece((0, 0), (0, 1), 'destroyer')
+    boards[1].place_piece((0, 3), (0, 4), 'cruiser')
+    events = ([], [])
+    for board, seen in zip(boards, events):
+        for event in (MISS, HIT, SUNK, 'game_over'):
+            board.subscribe(event, lambda result, event = event, seen = seen:
+                            seen.append((event, result)))
+    for cell in [(1, 1), (0, 0), (0, 1), (0, 3), (2, 2), (0, 4)]:
+        assert boards[0].attack(cell) == boards[1].attack(cell)
+    assert events[0] == events[1]
+    assert len(events[1]) == 7
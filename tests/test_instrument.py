@@ -0,0 +1,88 @@
+'''
+Instrumentation puts the wrappers of its targets in place while enabled and
+the original functions back when disabled, counting every shot once.
+'''
+
+import random
+
+import pytest
+
+import battleship
+import engine
+import instrument
+import simulate
+
+
+def _originals():
+    return [(op, module, cls, attr,
+             getattr(getattr(__import__(module), cls) if cls else
+                     __import__(module), attr))
+            for op, module, cls, attr in instrument.TARGETS]
+
+
+def test_enable_disable():
+    before = _originals()
+    with instrument.Instruments() as instruments:
+        for (op, module, cls, attr, original), now in zip(before,
+                                                          _originals()):
+            assert now[4] is not original
+            assert now[4].__wrapped__ is original
+        assert instrument._active is instruments
+        with pytest.raises(Exception) as info:
+            instrument.Instruments().enable()
+        assert str(info.value) == 'Instrumentation already enabled.'
+    assert _originals() == before
+    assert instrument._active is None
+    assert engine.PersonalBoard.__dict__['attack'] is before[1][4]
+    assert battleship.PersonalBoard is engine.PersonalBoard
+
+
+class _Keep(object):
+    '''
+    Stand-in for a GameWriter that keeps every game written.
+    '''
+
+    def __init__(self):
+        self.games = []
+
+    def write(self, winner, fleets, shots):
+        self.games.append((winner, fleets, shots))
+
+
+def test_counters():
+    instruments = instrument.Instruments()
+    keep = _Keep()
+    with instruments:
+        results = simulate.simulate(5, simulate.random_placement,
+                                    simulate.random_placement,
+                                    simulate.HuntShooter, simulate.HuntShooter,
+                                    seed=1, record=keep)
+        assert len(keep.games) == len(results)
+        board = engine.PersonalBoard()
+        board.place_piece((0, 0), (0, 1), 'destroyer')
+        board.attack((0, 0))
+        board.make_move((5, 5))
+        for cell in ((0, 0), (10, 0)):
+            with pytest.raises(Exception):
+                board.opponent_move(cell)
+        with pytest.raises(Exception):
+            board.place_piece((0, 0), (1, 0), 'cruiser')
+    counters = instruments.counters
+    outcomes = [result[:4] for winner, fleets, shots in keep.games
+                for cell, result in shots] + ['hit', 'miss']
+    #every shot once, whether fired by opponent_move, attack or make_move
+    assert counters['shots'] == len(outcomes)
+    assert counters['opponent_move_calls'] == len(outcomes) + 2
+    assert counters['attack_calls'] == 1
+    assert counters['misses'] == outcomes.count('miss')
+    assert counters['hits'] == outcomes.count('hit')
+    assert counters['sinks'] == outcomes.count('sunk')
+    assert counters['games'] == len(results)
+    assert counters['repeat_attack_errors'] == 1
+    assert counters['overlap_errors'] == 1
+    assert counters['errors'] == 1
+
+    #nothing is counted once disabled
+    board = engine.PersonalBoard()
+    board.opponent_move((0, 0))
+    assert instruments.counters == counters
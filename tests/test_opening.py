@@ -0,0 +1,35 @@
+'''
+Tests of the opening book shipped with the game.
+'''
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import ai
+import opening
+from engine import DEFAULT_CONFIG, GameConfig
+
+
+def test_shipped_book():
+    book = opening.default_book(DEFAULT_CONFIG)
+    assert book is not None and len(book) > 0
+    assert opening.default_book(DEFAULT_CONFIG) is book
+    sizes = DEFAULT_CONFIG.sizes()
+    view = np.zeros((DEFAULT_CONFIG.rows, DEFAULT_CONFIG.cols), dtype=np.int8)
+    cell = book.lookup(view, sizes)
+    assert cell is not None
+    #the book shot is as dense as the one ai.best_shot picks
+    density = ai.density(view, sizes)
+    assert density[cell] == density[ai.best_shot(view, sizes)]
+
+
+def test_missing_and_unusable_books(tmp_path):
+    assert opening.default_book(path=str(tmp_path / 'missing.book')) is None
+    config = GameConfig(6, 6, [('raft', 1), ('skiff', 3)])
+    with pytest.warns(UserWarning, match='another game configuration'):
+        assert opening.default_book(config) is None
+    path = tmp_path / 'broken.book'
+    path.write_bytes(b'not a book at all')
+    with pytest.warns(UserWarning, match='Not an opening book file.'):
+        assert opening.default_book(path=str(path)) is None
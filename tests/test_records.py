@@ -0,0 +1,81 @@
+'''
+Round trip of the record files: games written by GameWriter come back
+unchanged from GameReader, decoded or as NumPy views of the mapped file.
+'''
+
+import pytest
+
+import records
+import simulate
+from engine import DEFAULT_CONFIG, GameConfig
+
+
+class _Keep(object):
+    '''
+    Stand-in for a GameWriter that keeps every game written.
+    '''
+
+    def __init__(self):
+        self.games = []
+
+    def write(self, winner, fleets, shots):
+        self.games.append((winner, fleets, shots))
+
+
+def _games(count, config, seed = 0):
+    keep = _Keep()
+    simulate.simulate(count, simulate.random_placement,
+                      simulate.random_placement, simulate.HuntShooter,
+                      simulate.HuntShooter, seed, config, record=keep)
+    return keep.games
+
+
+def _expected(game, config):
+    '''
+    Returns the GameRecord that reading back a written game gives: the fleets
+    in the order of the fleet of the GameConfig and the outcomes as ints.
+    '''
+    winner, fleets, shots = game
+    order = dict((name, i) for i, (name, size) in enumerate(config.fleet))
+    return records.GameRecord(
+        winner,
+        [sorted(fleet, key=lambda ship: order[ship[2]]) for fleet in fleets],
+        [(cell, records.outcome(result)) for cell, result in shots])
+
+
+@pytest.mark.parametrize('config', [
+    DEFAULT_CONFIG,
+    GameConfig(7, 12, [('raft', 1), ('skiff', 3), ('barge', 6)])])
+def test_round_trip(tmp_path, config):
+    path = str(tmp_path / 'games.bsgr')
+    games = _games(30, config)
+    #two writers appending to the same file
+    for part in (games[:10], games[10:]):
+        with records.GameWriter(path, config) as writer:
+            for game in part:
+                writer.write(*game)
+    with records.GameReader(path) as reader:
+        assert (reader.config.rows, reader.config.cols, reader.config.fleet) \
+            == (config.rows, config.cols, config.fleet)
+        assert list(reader) == [_expected(game, config) for game in games]
+        for (winner, ends, shots), game in zip(reader.arrays(), games):
+            record = _expected(game, config)
+            assert winner == record.winner
+            assert [divmod(int(cell), config.cols) for cell in ends.ravel()] \
+                == [cell for fleet in record.fleets
+                    for start, end, name in fleet for cell in (start, end)]
+            assert [(divmod(int(code) >> 2, config.cols), int(code) & 3)
+                    for code in shots] == record.shots
+            del ends, shots
+
+
+def test_other_config(tmp_path):
+    path = str(tmp_path / 'games.bsgr')
+    records.GameWriter(path, DEFAULT_CONFIG).close()
+    with pytest.raises(Exception) as info:
+        records.GameWriter(path, GameConfig(8, 8))
+    assert str(info.value) == 'Record file is for another game configuration.'
+    open(str(tmp_path / 'empty'), 'wb').close()
+    with pytest.raises(Exception) as info:
+        records.GameReader(str(tmp_path / 'empty'))
+    assert str(info.value) == 'Not a game record file.'
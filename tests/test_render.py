@@ -0,0 +1,30 @@
+'''
+Tests of the diff-based board renderer.
+'''
+
+import io
+
+import render
+
+
+def test_frames():
+    out = io.StringIO()
+    renderer = render.BoardRenderer(2, 3, out=out)
+    board = [[0, 1, 1], [0, 0, 0]]
+    renderer.draw(board)
+    assert out.getvalue() == ('\x1b[1;1H0     1     1     '
+                              '\x1b[2;1H0     0     0     \x1b[3;1H')
+    assert render.CLEAR not in out.getvalue()
+    assert renderer.frame([list(row) for row in board]) == ''
+    board[1][2] = 'M'
+    assert renderer.frame(board) == '\x1b[2;13HM     \x1b[3;1H'
+
+
+def test_clear():
+    renderer = render.BoardRenderer(1, 1, opponent=True, clear=True)
+    assert renderer.frame([[2]]).startswith(render.CLEAR + '\x1b[1;1H0')
+    assert renderer.frame([['H']]) == '\x1b[1;1HH     \x1b[2;1H'
+    renderer.invalidate()
+    assert not renderer.frame([['H']]).startswith(render.CLEAR)
+    renderer.invalidate(clear=True)
+    assert renderer.frame([['H']]).startswith(render.CLEAR)
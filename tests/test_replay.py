@@ -0,0 +1,74 @@
+'''
+Seeking a Replay to any turn, through its checkpoints, gives the boards of a
+replay stepped from turn 0 to that turn.
+'''
+
+import random
+
+import pytest
+
+import simulate
+from engine import GameConfig
+from records import GameRecord
+from replay import Replay
+
+
+class _Keep(object):
+    '''
+    Stand-in for a GameWriter that keeps the last game written.
+    '''
+
+    def write(self, winner, fleets, shots):
+        self.game = GameRecord(winner, fleets, list(shots))
+
+
+def _game(config, seed):
+    keep = _Keep()
+    simulate.play_game(simulate.random_placement, simulate.random_placement,
+                       simulate.RandomShooter, simulate.RandomShooter,
+                       random.Random(seed), config, record=keep)
+    return keep.game
+
+
+def _state(replay):
+    return replay.turn, replay.player1.board, replay.player2.board
+
+
+@pytest.mark.parametrize('interval', [1, 7, 64])
+def test_seek(interval):
+    config = GameConfig(12, 12)
+    record = _game(config, 5)
+    sequential = Replay(record, config, interval=len(record.shots) + 1)
+    states = [_state(sequential)]
+    while sequential.step():
+        states.append(_state(sequential))
+    assert len(states) == len(record.shots) + 1
+
+    replay = Replay(record, config, interval)
+    rng = random.Random(interval)
+    turns = [rng.randrange(len(states)) for i in range(300)]
+    turns += [len(states) - 1, 0, len(states) - 1, 1]
+    for turn in turns:
+        replay.seek(turn)
+        assert _state(replay) == states[turn]
+    #a checkpoint at every interval turns up to the furthest turn reached
+    assert len(replay.checkpoints) == (len(states) - 1) // interval + 1
+
+    for turn, player, view in replay.frames(step=-1):
+        assert _state(replay) == states[turn]
+    assert replay.turn == 0 and not replay.back()
+    for turn in (-1, len(states)):
+        with pytest.raises(Exception) as info:
+            replay.seek(turn)
+        assert str(info.value) == 'Turn out of range.'
+
+
+def test_wrong_record():
+    config = GameConfig(8, 8)
+    record = _game(config, 1)
+    cell, result = record.shots[0]
+    shots = [(cell, 'sunk: carrier' if result == 'miss' else 'miss')]
+    replay = Replay(GameRecord(record.winner, record.fleets, shots), config)
+    with pytest.raises(Exception) as info:
+        replay.step()
+    assert str(info.value) == 'Record does not match the game.'
@@ -0,0 +1,92 @@
+'''
+Tests of the game server: malformed requests are answered with an error and
+leave the session as it was, and a whole game can be played over a
+connection.
+'''
+
+import asyncio
+import json
+
+import pytest
+
+from engine import GameConfig
+from server import PLACING, PLAYING, GameServer, Session
+
+#a destroyer and a cruiser on a 3x4 board
+CONFIG = GameConfig(3, 4, [('destroyer', 2), ('cruiser', 2)])
+
+FLEET = [{'cmd': 'place', 'start': [0, 0], 'end': [0, 1], 'name': 'destroyer'},
+         {'cmd': 'place', 'start': [2, 2], 'end': [2, 3], 'name': 'cruiser'}]
+
+
+def _playing():
+    session = Session(CONFIG)
+    for player in (1, 2):
+        for request in FLEET:
+            assert session.handle(request)['ok']
+    assert session.phase == PLAYING
+    return session
+
+
+@pytest.mark.parametrize('request_', [
+    {'cmd': 'place', 'start': [5], 'end': [0, 1], 'name': 'destroyer'},
+    {'cmd': 'place', 'start': [0, 0, 0], 'end': [0, 1], 'name': 'destroyer'},
+    {'cmd': 'place', 'start': [0, 0], 'end': [0, '1'], 'name': 'destroyer'},
+    {'cmd': 'place', 'start': [0, 0], 'end': [0, 1.0], 'name': 'destroyer'},
+    {'cmd': 'place', 'start': [0, 0], 'end': [0, True], 'name': 'destroyer'},
+    {'cmd': 'place', 'start': 3, 'end': [0, 1], 'name': 'destroyer'},
+    {'cmd': 'place', 'start': {'x': 0}, 'end': [0, 1], 'name': 'destroyer'},
+    {'cmd': 'place', 'start': [0, 0], 'end': [0, 1], 'name': ['destroyer']},
+    {'cmd': 'place', 'start': [0, 0], 'end': [0, 1]}])
+def test_malformed_place(request_):
+    session = Session(CONFIG)
+    assert session.handle(request_) == {'ok': False,
+                                        'error': 'Malformed request.'}
+    assert session.phase == PLACING and not session.board(1).pieces
+
+
+@pytest.mark.parametrize('cell', [[5], [], [1, 1, 1], '11', [None, 1], None])
+def test_malformed_attack(cell):
+    session = _playing()
+    assert session.handle({'cmd': 'attack', 'cell': cell}) == \
+        {'ok': False, 'error': 'Malformed request.'}
+    assert session.player == 1
+    assert all(val not in ('M', 'H', 'S') for row in session.board(2).board
+               for val in row)
+
+
+def test_out_of_bounds():
+    session = Session(CONFIG)
+    response = session.handle({'cmd': 'place', 'start': [-1, 0], 'end': [0, 0],
+                               'name': 'destroyer'})
+    assert response == {'ok': False,
+                        'error': 'Entered numbers are out of bounds.'}
+    session = _playing()
+    for cell in ([3, 0], [0, -1]):
+        assert session.handle({'cmd': 'attack', 'cell': cell}) == \
+            {'ok': False, 'error': 'Entered numbers are out of bounds.'}
+
+
+def test_game_over_connection():
+    async def play():
+        server = await GameServer(CONFIG).start()
+        host, port = server.address()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        responses = []
+        requests = FLEET * 2 + [{'cmd': 'attack', 'cell': [5]}] + \
+            [{'cmd': 'attack', 'cell': cell}
+             for cell in ([0, 0], [0, 1], [2, 2], [2, 3])]
+        for request in requests:
+            writer.write(json.dumps(request).encode() + b'\n')
+            responses.append(json.loads(await reader.readline()))
+        assert await reader.readline() == b''
+        writer.close()
+        await server.close()
+        return responses
+
+    responses = asyncio.run(play())
+    assert all(response['ok'] for response in responses[:4])
+    assert responses[4] == {'ok': False, 'error': 'Malformed request.'}
+    assert [response['result'] for response in responses[5:]] == \
+        ['hit', 'sunk: destroyer', 'hit', 'sunk: cruiser']
+    assert responses[-1]['winner'] == 1
@@ -0,0 +1,24 @@
+'''
+Tests of the simulator.
+'''
+
+import bench
+import simulate
+
+
+def test_memory_against_legacy_board():
+    memory = bench.compare_memory(200)
+    assert memory['PersonalBoard'] < 0.7 * memory['LegacyBoard']
+    assert memory['BitBoard'] < memory['PersonalBoard']
+
+
+def test_legacy_board_matches_personal_board():
+    import random
+    from engine import DEFAULT_CONFIG, PersonalBoard
+    rng = random.Random(0)
+    for i in range(50):
+        legacy, board = bench.LegacyBoard(), PersonalBoard()
+        for start, end, name in simulate.random_placement(rng, DEFAULT_CONFIG):
+            legacy.place_piece(start, end, name)
+            board.place_piece(start, end, name)
+        assert legacy.board == board.board
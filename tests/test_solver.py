@@ -0,0 +1,133 @@
+'''
+Tests of the endgame solver against a brute-force expectimax.
+'''
+
+import random
+import time
+from functools import lru_cache
+
+import pytest
+
+import solver
+from engine import GameConfig, PersonalBoard
+from simulate import random_placement
+
+
+def _placements(config, size):
+    '''
+    Returns the cell sets of every placement of a ship of size.
+    '''
+    found = []
+    for x in range(config.rows):
+        for y in range(config.cols):
+            if y + size <= config.cols:
+                found.append(frozenset((x, y + i) for i in range(size)))
+            if size > 1 and x + size <= config.rows:
+                found.append(frozenset((x + i, y) for i in range(size)))
+    return found
+
+
+def brute_force(config, board, afloat):
+    '''
+    Returns the smallest expected number of shots needed to sink the ships
+    afloat, where a sinking reveals the cells of the ship.
+    '''
+    marks = dict(((x, y), val) for x, row in enumerate(board)
+                 for y, val in enumerate(row) if val in ('M', 'H', 'S'))
+    hits = frozenset(cell for cell, val in marks.items() if val == 'H')
+    configs = [()]
+    for name in afloat:
+        size = config.types[name][1]
+        configs = [ships + (cells,) for ships in configs
+                   for cells in _placements(config, size)
+                   if not any(cell in marks and marks[cell] != 'H'
+                              for cell in cells)
+                   and not cells <= hits
+                   and not any(cells & other for other in ships)]
+    configs = [ships for ships in configs
+               if hits <= frozenset().union(*ships)]
+    cells = [(x, y) for x in range(config.rows) for y in range(config.cols)]
+
+    @lru_cache(None)
+    def value(group, shots):
+        if all(ship <= shots for ship in configs[group[0]]):
+            return 0.0
+        best = float('inf')
+        for cell in cells:
+            if cell in shots:
+                continue
+            outcomes = {}
+            for c in group:
+                outcome = 'miss'
+                for ship in configs[c]:
+                    if cell in ship:
+                        outcome = ship if ship <= shots | {cell} else 'hit'
+                outcomes.setdefault(outcome, []).append(c)
+            if list(outcomes) == ['miss']:
+                continue
+            expected = 1.0
+            for members in outcomes.values():
+                expected += (len(members) / len(group) *
+                             value(tuple(members), shots | {cell}))
+            best = min(best, expected)
+        return best
+
+    return value(tuple(range(len(configs))), frozenset(marks))
+
+
+@pytest.mark.parametrize('rows, cols, fleet, board, expected', [
+    (4, 4, [('destroyer', 2), ('cruiser', 2)],
+     [[0, 'H', 0, 'H'], [0, 0, 'M', 0], [0, 0, 0, 0], [0, 'M', 'M', 0]], 2.8),
+    (3, 3, [('destroyer', 2), ('submarine', 3)],
+     [[0, 0, 0], [0, 'H', 0], [0, 0, 0]], 5.2)])
+def test_sinking_reveals_the_ship(rows, cols, fleet, board, expected):
+    config = GameConfig(rows, cols, fleet)
+    afloat = [name for name, size in fleet]
+    solution = solver.Solver(config).solve(board, afloat, budget=60)
+    assert solution.exact
+    assert solution.expected == pytest.approx(expected)
+    assert brute_force(config, board, afloat) == pytest.approx(expected)
+
+
+def test_random_positions():
+    config = GameConfig(4, 4, [('destroyer', 2), ('submarine', 3)])
+    rng = random.Random(2)
+    cells = [(x, y) for x in range(config.rows) for y in range(config.cols)]
+    checked = 0
+    while checked < 15:
+        board = PersonalBoard(config)
+        for start, end, name in random_placement(rng, config):
+            board.place_piece(start, end, name)
+        rng.shuffle(cells)
+        for cell in cells[:rng.randrange(6, 10)]:
+            board.opponent_move(cell)
+        if board.game_over():
+            continue
+        afloat = [name for name, piece in board.pieces.items()
+                  if not piece.is_sunk()]
+        solution = solver.Solver(config).solve(board.board, afloat, budget=60)
+        assert solution.exact
+        assert solution.expected == pytest.approx(
+            brute_force(config, board.board, afloat))
+        checked += 1
+
+
+@pytest.mark.parametrize('shots', [0, 30])
+def test_budget(shots):
+    board = PersonalBoard()
+    for start, end, name in random_placement(random.Random(shots), board.config):
+        board.place_piece(start, end, name)
+    cells = [(x, y) for x in range(10) for y in range(10)]
+    random.Random(1).shuffle(cells)
+    for cell in cells[:shots]:
+        board.opponent_move(cell)
+    afloat = [name for name, piece in board.pieces.items()
+              if not piece.is_sunk()]
+    begin = time.perf_counter()
+    solution = solver.Solver().solve(board.board, afloat, budget=0.05,
+                                     limit=10**9)
+    #listing the placements of the whole fleet alone takes far longer
+    assert time.perf_counter() - begin < 0.5
+    assert not solution.exact
+    x, y = solution.cell
+    assert board.board[x][y] not in ('M', 'H', 'S')
@@ -0,0 +1,38 @@
+'''
+Cold start of the modules run by worker processes, measured with
+python -X importtime: the engine and the simulator must not load NumPy,
+argparse or the console game.
+'''
+
+import pytest
+
+import bench
+
+#generous bound of the cumulative import time, in microseconds
+LIMIT = 500000
+
+
+@pytest.mark.parametrize('module', ['engine', 'simulate'])
+def test_import_time(module):
+    profile = bench.import_profile(module)
+    assert module in profile
+    for heavy in ('numpy', 'argparse', 'battleship'):
+        assert heavy not in profile, heavy + ' imported by ' + module
+    assert profile[module] < LIMIT
+
+
+def test_battleship_loads_argparse_only_when_run():
+    profile = bench.import_profile('battleship')
+    assert 'engine' in profile
+    assert 'argparse' not in profile and 'numpy' not in profile
+
+
+@pytest.mark.parametrize('argv, computer', [([], False), (['play'], False),
+                                            (['play', '--computer'], True)])
+def test_play_is_the_default_command(monkeypatch, argv, computer):
+    import battleship
+    games = []
+    monkeypatch.setattr(battleship.BattleShip, '__main__',
+                        lambda self: games.append(self.computer))
+    assert battleship.main(argv) == 0
+    assert games == [computer]
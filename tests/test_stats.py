@@ -0,0 +1,85 @@
+'''
+The counts of ShotStats, added with one bincount per chunk of buffered cells,
+match the same counts made one cell at a time, and the shards of a collection
+get distinct seeds.
+'''
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import simulate
+import stats
+from engine import DEFAULT_CONFIG, MISS, GameConfig
+
+
+class _Keep(object):
+    '''
+    Stand-in for a GameWriter that keeps every game written.
+    '''
+
+    def __init__(self):
+        self.games = []
+
+    def write(self, winner, fleets, shots):
+        self.games.append((winner, fleets, shots))
+
+
+def _counted(games, config):
+    '''
+    Returns the shots, hits, first hits and placements of games counted by
+    adding 1 to an array for every cell.
+    '''
+    shots = np.zeros((config.rows, config.cols), dtype=np.int64)
+    hits = np.zeros_like(shots)
+    first_hits = np.zeros_like(shots)
+    placements = np.zeros((len(config.fleet),) + shots.shape, dtype=np.int64)
+    order = dict((name, i) for i, (name, size) in enumerate(config.fleet))
+    for winner, fleets, log in games:
+        for fleet in fleets:
+            for (x0, y0), (x1, y1), name in fleet:
+                placements[order[name], min(x0, x1):max(x0, x1) + 1,
+                           min(y0, y1):max(y0, y1) + 1] += 1
+        found = [False, False]
+        player = 0
+        for (x, y), result in log:
+            shots[x, y] += 1
+            if result == MISS:
+                player = 1 - player
+            else:
+                hits[x, y] += 1
+                if not found[player]:
+                    first_hits[x, y] += 1
+                    found[player] = True
+    return shots, hits, first_hits, placements
+
+
+@pytest.mark.parametrize('config', [
+    DEFAULT_CONFIG,
+    GameConfig(7, 12, [('raft', 1), ('skiff', 3), ('barge', 6)])])
+def test_counts(config):
+    keep = _Keep()
+    simulate.simulate(40, simulate.random_placement, simulate.random_placement,
+                      simulate.HuntShooter, simulate.HuntShooter, 2, config,
+                      record=keep)
+    #a small chunk flushes the buffers while the games are written
+    shot_stats = stats.ShotStats(config, chunk=100)
+    for game in keep.games:
+        shot_stats.write(*game)
+    shot_stats.flush()
+    shots, hits, first_hits, placements = _counted(keep.games, config)
+    assert (shot_stats.shots == shots).all()
+    assert (shot_stats.hits == hits).all()
+    assert (shot_stats.first_hits == first_hits).all()
+    assert (shot_stats.placements == placements).all()
+    assert shot_stats.boards == shot_stats.fleets == 2 * len(keep.games)
+    assert shot_stats.shots.sum() == sum(len(log) for winner, fleets, log
+                                         in keep.games)
+
+
+def test_shard_seeds():
+    seeds = stats.shard_seeds(0, 50)
+    assert seeds == stats.shard_seeds(0, 50)
+    assert stats.shard_seeds(0, 10) == seeds[:10]
+    #neither repeated within a collection nor shared with the next seed
+    assert len(set(seeds + stats.shard_seeds(1, 50))) == 100
@@ -0,0 +1,61 @@
+'''
+validate_fleets against PersonalBoard.place_piece: every ship gets the error
+code of the exception place_piece raises for it, or OK if it is placed.
+'''
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import validate
+from engine import DEFAULT_CONFIG, GameConfig, PersonalBoard
+from fleets import random_fleets
+
+
+def _codes(fleet, config):
+    '''
+    Returns the error codes of placing the ships of fleet one by one.
+    '''
+    codes = dict((message, code) for code, message in validate.MESSAGES.items())
+    board = PersonalBoard(config)
+    found = []
+    for (name, size), (x0, y0, x1, y1) in zip(config.fleet, fleet):
+        try:
+            board.place_piece((x0, y0), (x1, y1), name)
+            found.append(validate.OK)
+        except Exception as e:
+            found.append(codes[str(e)])
+    return found
+
+
+@pytest.mark.parametrize('config', [
+    DEFAULT_CONFIG,
+    GameConfig(6, 8, [('raft', 1), ('skiff', 3), ('barge', 6)])])
+def test_codes_match_place_piece(config):
+    rng = np.random.default_rng(5)
+    fleets = random_fleets(3000, config, seed=5).astype(np.int64)
+    #move the ends of half of the ships by up to two cells
+    moved = rng.random(fleets.shape[:2]) < 0.5
+    fleets += moved[..., None] * rng.integers(-2, 3, fleets.shape)
+    codes = validate.validate_fleets(fleets, config, chunk=700)
+    expected = [_codes(fleet, config) for fleet in fleets.tolist()]
+    assert codes.tolist() == expected
+    #every kind of error shows up
+    assert set(codes.ravel().tolist()) == set(range(5))
+    assert validate.valid(codes).tolist() == [
+        all(code == validate.OK for code in fleet) for fleet in expected]
+
+
+def test_errors_and_fleet_array():
+    fleet = [((0, 0), (0, 1), 'destroyer'), ((0, 1), (1, 1), 'cruiser'),
+             ((2, 0), (4, 2), 'submarine'), ((9, 9), (9, 12), 'battleship'),
+             ((5, 0), (5, 3), 'carrier')]
+    codes = validate.validate_fleets(validate.fleet_array([fleet]))[0]
+    assert validate.errors(codes) == [
+        ('cruiser', 'Illegal overlapping of ships.'),
+        ('submarine', 'Invalid arrangement of the piece.'),
+        ('battleship', 'Entered numbers are out of bounds.'),
+        ('carrier', 'Invalid piece size.')]
+    with pytest.raises(Exception) as info:
+        validate.fleet_array([fleet[:4]])
+    assert str(info.value) == 'Fleet does not match the game configuration.'
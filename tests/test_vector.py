@@ -0,0 +1,72 @@
+'''
+Parity of BatchBoards with PersonalBoard: the same fleets are placed on a
+batch and on one PersonalBoard per game, and random shots, repeated and out of
+bounds ones among them, are fired at both.
+'''
+
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import ai
+import records
+from engine import DEFAULT_CONFIG, GameConfig, PersonalBoard
+from fleets import random_fleets
+from vector import IDLE, OUT_OF_BOUNDS, REPEATED, BatchBoards
+
+
+def _expected(board, cell):
+    '''
+    Returns the outcome and ship ID that BatchBoards.fire should give for
+    a shot at cell on board, firing it on board.
+    '''
+    if board.game_over():
+        return IDLE, 0
+    if not board.config.in_bounds(cell):
+        return OUT_OF_BOUNDS, 0
+    ID = board.board[cell[0]][cell[1]]
+    if ID in ('M', 'H', 'S'):
+        return REPEATED, 0
+    return records.outcome(board.opponent_move(cell)), ID
+
+
+@pytest.mark.parametrize('config', [
+    DEFAULT_CONFIG,
+    GameConfig(6, 8, [('raft', 1), ('skiff', 3), ('barge', 6)])])
+def test_parity(config):
+    rng = random.Random(3)
+    fleets = random_fleets(40, config, seed=3)
+    batch = BatchBoards(fleets, config)
+    boards = []
+    for fleet in fleets:
+        board = PersonalBoard(config)
+        for (name, size), (x0, y0, x1, y1) in zip(config.fleet, fleet.tolist()):
+            board.place_piece((x0, y0), (x1, y1), name)
+        boards.append(board)
+    assert (batch.ships == np.array([board.board for board in boards])).all()
+
+    for turn in range(3 * config.rows * config.cols):
+        cells = [(rng.randrange(-1, config.rows + 1),
+                  rng.randrange(-1, config.cols + 1)) for board in boards]
+        expected = [_expected(board, cell) for board, cell in zip(boards, cells)]
+        outcomes, ids, over = batch.fire(np.array(cells))
+        assert outcomes.tolist() == [outcome for outcome, ID in expected]
+        assert ids.tolist() == [ID for outcome, ID in expected]
+        assert over.tolist() == [board.game_over() for board in boards]
+        assert (batch.marks == np.array([ai.opponent_view(board.board)
+                                         for board in boards])).all()
+    assert over.any()
+
+
+def test_strict():
+    fleets = random_fleets(2, seed=0)
+    batch = BatchBoards(fleets)
+    with pytest.raises(Exception) as info:
+        batch.fire(np.array([[0, 0], [10, 0]]), strict=True)
+    assert str(info.value) == 'Entered numbers are out of bounds.'
+    batch.fire(np.array([[0, 0], [0, 0]]), strict=True)
+    with pytest.raises(Exception) as info:
+        batch.fire(np.array([[1, 0], [0, 0]]), strict=True)
+    assert str(info.value) == 'Already attacked that square.'
@@ -0,0 +1,180 @@
+'''
+Round-robin tournaments between simulation strategies, sharded over a pool of
+worker processes. Every shard plays a fixed number of games of one pairing with
+its own deterministic seed and sends back a single summary, so results do not
+depend on the number of workers and no per-game objects cross processes.
+'''
+
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from itertools import combinations
+
+from engine import DEFAULT_CONFIG, PersonalBoard
+from simulate import play_game
+
+
+class PairStats(object):
+    '''
+    PairStats accumulates the results of the games between two entrants: the
+    number of games, the wins of each entrant and a histogram of the number of
+    shots the winner needed.
+    '''
+
+    def __init__(self, first, second):
+        '''
+        Initializes empty statistics for the pairing of the entrants named
+        first and second.
+        '''
+        self.first = first
+        self.second = second
+        self.games = 0
+        self.wins = [0, 0]
+        self.shots = Counter()
+
+    def merge(self, other):
+        '''
+        Adds the statistics of other, which must be for the same pairing.
+        '''
+        self.games += other.games
+        self.wins[0] += other.wins[0]
+        self.wins[1] += other.wins[1]
+        self.shots.update(other.shots)
+
+    def win_rate(self):
+        '''
+        Returns the fraction of the games won by the first entrant.
+        '''
+        if self.games == 0:
+            return 0.0
+        return self.wins[0] / self.games
+
+    def mean_shots(self):
+        '''
+        Returns the average number of shots the winner needed.
+        '''
+        if self.games == 0:
+            return 0.0
+        return sum(k * v for k, v in self.shots.items()) / self.games
+
+
+def shard_seed(seed, pair, shard):
+    '''
+    This function derives the seed of one shard from the tournament seed, the
+    index of the pairing and the index of the shard with
+    numpy.random.SeedSequence: the seed of shard s of pairing p is the one of
+    SeedSequence(seed).spawn(p + 1)[p].spawn(s + 1)[s], so the streams of the
+    shards are independent of each other and of the other tournament seeds.
+
+    Returns: int
+    '''
+    #imported here so that importing the module does not import NumPy
+    from numpy import uint64
+    from numpy.random import SeedSequence
+    sequence = SeedSequence(seed, spawn_key=(pair, shard))
+    return int(sequence.generate_state(1, uint64)[0])
+
+
+def run_shard(job):
+    '''
+    This function plays one shard of games in a worker process. The entrants
+    swap seats after every game, so that both move first equally often
+    whatever the number of games of the shard; odd shards start with the
+    seats swapped, which evens out shards of an odd number of games.
+
+    Args:
+        job: tuple (pair index, shard index, first entrant, second entrant,
+             number of games, seed, board class, GameConfig) where each entrant
+             is a tuple (name, placement strategy, firing strategy)
+
+    Returns: tuple (pair index, PairStats, process id, seconds spent)
+    '''
+    index, shard, first, second, games, seed, board, config = job
+    stats = PairStats(first[0], second[0])
+    rng = random.Random(seed)
+    begin = time.perf_counter()
+    for game in range(games):
+        swap = (shard + game) & 1
+        one, two = (second, first) if swap else (first, second)
+        result = play_game(one[1], two[1], one[2], two[2], rng, config, board)
+        winner = (result.winner - 1) ^ swap
+        stats.wins[winner] += 1
+        stats.shots[result.shots] += 1
+    stats.games = games
+    return index, stats, os.getpid(), time.perf_counter() - begin
+
+
+def run_tournament(entrants, games, workers = None, chunk = 1000, seed = 0,
+                   board = PersonalBoard, config = DEFAULT_CONFIG):
+    '''
+    This function plays games between every pair of entrants on a process pool.
+    The games of each pairing are split in shards of at most chunk games; the
+    shards are merged as they come back.
+
+    Args:
+        entrants: dictionary where keys are entrant names and values are tuples
+                  (placement strategy, firing strategy); strategies must be
+                  picklable, e.g. module level functions and classes
+        games: number of games per pairing
+        workers: number of worker processes, defaults to the number of cores
+        chunk: number of games per shard
+        seed: tournament seed
+        board: class of the board engine
+        config: the GameConfig of the games
+
+    Returns: tuple (list of PairStats, throughput dictionary) where the
+             throughput has the total games, wall time, games/sec overall,
+             games/sec of every worker and the scaling efficiency (overall
+             rate divided by workers times the mean worker rate)
+    '''
+    names = sorted(entrants)
+    pairs = list(combinations(names, 2))
+    jobs = []
+    for index, (a, b) in enumerate(pairs):
+        first = (a,) + tuple(entrants[a])
+        second = (b,) + tuple(entrants[b])
+        for shard, start in enumerate(range(0, games, chunk)):
+            jobs.append((index, shard, first, second, min(chunk, games - start),
+                         shard_seed(seed, index, shard), board, config))
+
+    workers = workers or os.cpu_count() or 1
+    stats = [PairStats(a, b) for a, b in pairs]
+    busy = Counter()
+    played = Counter()
+    begin = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for index, shard, pid, spent in pool.imap_unordered(run_shard, jobs):
+            stats[index].merge(shard)
+            busy[pid] += spent
+            played[pid] += shard.games
+    wall = time.perf_counter() - begin
+
+    total = sum(played.values())
+    per_worker = dict((pid, played[pid] / busy[pid]) for pid in played
+                      if busy[pid] > 0)
+    rate = total / wall if wall > 0 else 0.0
+    mean = sum(per_worker.values()) / len(per_worker) if per_worker else 0.0
+    throughput = {'games': total,
+                  'seconds': wall,
+                  'workers': workers,
+                  'games_per_sec': rate,
+                  'games_per_sec_per_worker': per_worker,
+                  'efficiency': rate / (workers * mean) if mean else 0.0}
+    return stats, throughput
+
+
+def report(stats, throughput):
+    '''
+    This function prints the win rates of every pairing and the throughput of
+    a tournament returned by run_tournament.
+    '''
+    for pair in stats:
+        print('%s vs %s: %d games, %.3f win rate, %.1f shots to win' %
+              (pair.first, pair.second, pair.games, pair.win_rate(),
+               pair.mean_shots()))
+    print('%d games in %.2fs: %.0f games/sec on %d workers (%.0f%% efficiency)' %
+          (throughput['games'], throughput['seconds'],
+           throughput['games_per_sec'], throughput['workers'],
+           100 * throughput['efficiency']))
@@ -0,0 +1,156 @@
+'''
+Bulk validation of fleets. validate_fleets checks many fleets at once with the
+rules of PersonalBoard.place_piece and returns an error code per ship instead
+of raising an exception at the first bad one. The ships of a fleet are placed
+in order, and each one is checked like Piece and place_piece do: first its
+arrangement and size, then its bounds, then overlaps with the ships placed
+before it. A ship with an error is not placed, as when place_piece raises, so
+later ships are only checked against the valid ones.
+'''
+
+import time
+
+import numpy as np
+
+from engine import DEFAULT_CONFIG, PersonalBoard
+
+#error codes of a ship
+OK = 0
+WRONG_SIZE = 1
+DIAGONAL = 2
+OUT_OF_BOUNDS = 3
+OVERLAP = 4
+
+#messages of the exceptions place_piece raises for every error code
+MESSAGES = {WRONG_SIZE: 'Invalid piece size.',
+            DIAGONAL: 'Invalid arrangement of the piece.',
+            OUT_OF_BOUNDS: 'Entered numbers are out of bounds.',
+            OVERLAP: 'Illegal overlapping of ships.'}
+
+
+def fleet_array(fleets, config = DEFAULT_CONFIG):
+    '''
+    This function converts fleets given as lists of (start, end, name) tuples
+    into the array validate_fleets takes, with the ships in the order of the
+    fleet of config.
+
+    Exceptions:
+        if a fleet does not have every ship of config exactly once
+
+    Returns: int64 array of shape (fleets, ships, 4)
+    '''
+    order = dict((name, i) for i, (name, size) in enumerate(config.fleet))
+    array = np.zeros((len(fleets), len(order), 4), dtype=np.int64)
+    for f, fleet in enumerate(fleets):
+        if sorted(name for start, end, name in fleet) != sorted(order):
+            raise Exception('Fleet does not match the game configuration.')
+        for start, end, name in fleet:
+            array[f, order[name]] = tuple(start) + tuple(end)
+    return array
+
+
+def validate_fleets(fleets, config = DEFAULT_CONFIG, chunk = 4096):
+    '''
+    This function checks fleets with NumPy operations over whole chunks of
+    fleets at a time, one pass per ship.
+
+    Args:
+        fleets: int array of shape (fleets, ships, 4) with the start row, start
+                column, end row and end column of every ship in the order of
+                the fleet of config, as returned by fleets.random_fleets or
+                fleet_array
+        config: the GameConfig of the game
+        chunk: number of fleets checked per pass, to bound memory use
+
+    Exceptions:
+        if the array does not have the shape of fleets of config
+
+    Returns: uint8 array of shape (fleets, ships) of error codes
+    '''
+    fleets = np.asarray(fleets)
+    count = len(config.fleet)
+    if fleets.ndim != 3 or fleets.shape[1:] != (count, 4):
+        raise Exception('Fleets do not match the game configuration.')
+    rows, cols = config.rows, config.cols
+    codes = np.zeros(fleets.shape[:2], dtype=np.uint8)
+    for first in range(0, len(fleets), chunk):
+        block = fleets[first:first + chunk].astype(np.int64)
+        n = len(block)
+        fleet = np.arange(n)[:, None]
+        occupied = np.zeros((n, rows * cols), dtype=bool)
+        for ship, (name, size) in enumerate(config.fleet):
+            x0, y0, x1, y1 = block[:, ship].T
+            code = np.zeros(n, dtype=np.uint8)
+            length = np.maximum(abs(x1 - x0), abs(y1 - y0)) + 1
+            code[length != size] = WRONG_SIZE
+            code[(x0 != x1) & (y0 != y1)] = DIAGONAL
+            outside = ((np.minimum(x0, x1) < 0) | (np.maximum(x0, x1) >= rows) |
+                       (np.minimum(y0, y1) < 0) | (np.maximum(y0, y1) >= cols))
+            code[(code == OK) & outside] = OUT_OF_BOUNDS
+            #cells of the ships that are in bounds, the others look at cell 0
+            placed = code == OK
+            steps = np.arange(size)
+            first_cell = np.where(placed, np.minimum(x0, x1)*cols +
+                                  np.minimum(y0, y1), 0)
+            step = np.where(x0 != x1, cols, 1)
+            cells = first_cell[:, None] + (step * placed)[:, None] * steps
+            overlap = placed & occupied[fleet, cells].any(axis=1)
+            code[overlap] = OVERLAP
+            placed &= ~overlap
+            occupied[fleet[placed], cells[placed]] = True
+            codes[first:first + n, ship] = code
+    return codes
+
+
+def valid(codes):
+    '''
+    Returns a boolean array, True for the fleets whose ships have no error.
+    '''
+    return (codes == OK).all(axis=1)
+
+
+def errors(codes, config = DEFAULT_CONFIG):
+    '''
+    This function lists the errors of one fleet.
+
+    Args:
+        codes: the error codes of the ships of the fleet, a row of the array
+               returned by validate_fleets
+
+    Returns: list of (name, message) tuples, with the message of the
+             exception place_piece raises
+    '''
+    return [(name, MESSAGES[int(code)])
+            for (name, size), code in zip(config.fleet, codes) if code != OK]
+
+
+def benchmark(n = 100000, config = DEFAULT_CONFIG, seed = 0):
+    '''
+    This function compares how many fleets per second validate_fleets and
+    PersonalBoard.place_piece check, on random fleets where the end of a third
+    of the ships has been moved by up to one cell in each direction.
+
+    Returns: dictionary with the fleets/sec of both ways
+    '''
+    from fleets import random_fleets
+    fleets = random_fleets(n, config, seed).astype(np.int64)
+    rng = np.random.default_rng(seed)
+    moved = rng.random(fleets.shape[:2]) < 1 / 3
+    fleets[..., 2:] += moved[..., None] * rng.integers(-1, 2, fleets.shape[:2] +
+                                                       (2,))
+    begin = time.perf_counter()
+    validate_fleets(fleets, config)
+    batched = n / (time.perf_counter() - begin)
+
+    names = [name for name, size in config.fleet]
+    sample = fleets[:min(n, 10000)].tolist()
+    begin = time.perf_counter()
+    for fleet in sample:
+        board = PersonalBoard(config)
+        for name, (x0, y0, x1, y1) in zip(names, fleet):
+            try:
+                board.place_piece((x0, y0), (x1, y1), name)
+            except Exception:
+                pass
+    single = len(sample) / (time.perf_counter() - begin)
+    return {'place_piece': single, 'validate_fleets': batched}
@@ -0,0 +1,146 @@
+'''
+Batched game engine. BatchBoards holds the boards of B games as NumPy arrays
+and applies one shot to every game in a single vectorized call, with the same
+rules as PersonalBoard.opponent_move.
+'''
+
+import numpy as np
+
+import ai
+from engine import DEFAULT_CONFIG
+from records import MISS, HIT, SUNK
+
+#outcomes of shots that were not played
+REPEATED = -1
+OUT_OF_BOUNDS = -2
+IDLE = -3
+
+
+class BatchBoards(object):
+    '''
+    BatchBoards represents B boards of the same GameConfig with the following
+    arrays:
+        self.ships: B x rows x cols ship ID numbers, 0 on empty cells
+        self.shot: B x rows x cols booleans, True on attacked cells
+        self.hit: B x rows x cols booleans, True on attacked cells with a ship
+        self.marks: B x rows x cols opponent view, with the cell codes of
+                    ai.opponent_view ('M', 'H' and 'S' as ai.MISS, ai.HIT and
+                    ai.SUNK), so it can be passed to ai.density
+        self.remaining: B x (ships + 1) cells of each ship not hit yet, indexed
+                        by ID number
+        self.sunk_ships: number of ships sunk on each board
+    '''
+
+    def __init__(self, fleets, config = DEFAULT_CONFIG):
+        '''
+        Places the fleets on the boards.
+
+        Args:
+            fleets: int array of shape (B, ships, 4) with the start row, start
+                    column, end row and end column of every ship in the order
+                    of the fleet of config, as returned by fleets.random_fleets
+            config: the GameConfig of the games
+
+        Exceptions:
+            if the fleets do not match the GameConfig or a fleet is not legal
+        '''
+        fleets = np.asarray(fleets, dtype=np.int64)
+        count = len(config.fleet)
+        if fleets.ndim != 3 or fleets.shape[1:] != (count, 4):
+            raise Exception('Fleets do not match the game configuration.')
+        self.config = config
+        self.size = len(fleets)
+        rows, cols = config.rows, config.cols
+        batch = np.arange(self.size)
+        self.ships = np.zeros((self.size, rows, cols), dtype=np.int16)
+        for ID, (name, size) in enumerate(config.fleet, 1):
+            x0, y0, x1, y1 = fleets[:, ID - 1].T
+            if ((x0 != x1) & (y0 != y1)).any():
+                raise Exception('Invalid arrangement of the piece.')
+            if (np.maximum(abs(x1 - x0), abs(y1 - y0)) + 1 != size).any():
+                raise Exception('Invalid piece size.')
+            outside = ((np.minimum(x0, x1) < 0) | (np.maximum(x0, x1) >= rows) |
+                       (np.minimum(y0, y1) < 0) | (np.maximum(y0, y1) >= cols))
+            if outside.any():
+                raise Exception('Entered numbers are out of bounds.')
+            steps = np.arange(size)
+            xs = np.minimum(x0, x1)[:, None] + (x0 != x1)[:, None] * steps
+            ys = np.minimum(y0, y1)[:, None] + (y0 != y1)[:, None] * steps
+            if self.ships[batch[:, None], xs, ys].any():
+                raise Exception('Illegal overlapping of ships.')
+            self.ships[batch[:, None], xs, ys] = ID
+        self.shot = np.zeros(self.ships.shape, dtype=bool)
+        self.hit = np.zeros(self.ships.shape, dtype=bool)
+        self.marks = np.zeros(self.ships.shape, dtype=np.int8)
+        self.remaining = np.tile(np.array([0] + config.sizes(), dtype=np.int16),
+                                 (self.size, 1))
+        self.sunk_ships = np.zeros(self.size, dtype=np.int16)
+
+    def game_over(self):
+        '''
+        Returns a boolean array, True for the boards whose ships have all sunk.
+        '''
+        return self.sunk_ships == len(self.config.fleet)
+
+    def fire(self, cells, active = None, strict = False):
+        '''
+        This method attacks one cell on every active board that is not over.
+        The outcome is MISS, HIT or SUNK as in opponent_move; every cell of a
+        sunk ship is marked ai.SUNK in self.marks. Shots at cells that were
+        attacked before or are out of bounds change nothing and get REPEATED
+        or OUT_OF_BOUNDS, unless strict is set.
+
+        Args:
+            cells: int array of shape (B, 2) with the attacked cell of each
+                   board
+            active: optional boolean array of the boards that shoot; the
+                    others get IDLE, as do boards that are already over
+            strict: if True, raise the exceptions of opponent_move instead of
+                    returning REPEATED or OUT_OF_BOUNDS
+
+        Exceptions:
+            if strict and a cell is out of bounds or has been attacked before
+
+        Returns: tuple (outcomes, ship IDs hit or 0, game over flags) of arrays
+        '''
+        cells = np.asarray(cells, dtype=np.int64)
+        x, y = cells[:, 0], cells[:, 1]
+        outcomes = np.full(self.size, IDLE, dtype=np.int8)
+        playing = ~self.game_over()
+        if active is not None:
+            playing &= active
+        inside = ((x >= 0) & (x < self.config.rows) &
+                  (y >= 0) & (y < self.config.cols))
+        if strict and (playing & ~inside).any():
+            raise Exception('Entered numbers are out of bounds.')
+        outcomes[playing & ~inside] = OUT_OF_BOUNDS
+        playing &= inside
+
+        boards = np.nonzero(playing)[0]
+        x, y = x[boards], y[boards]
+        repeated = self.shot[boards, x, y]
+        if strict and repeated.any():
+            raise Exception('Already attacked that square.')
+        outcomes[boards[repeated]] = REPEATED
+        boards, x, y = boards[~repeated], x[~repeated], y[~repeated]
+
+        self.shot[boards, x, y] = True
+        ids = self.ships[boards, x, y]
+        hit_ids = np.zeros(self.size, dtype=np.int16)
+        hit_ids[boards] = ids
+        hit = ids != 0
+        self.marks[boards, x, y] = np.where(hit, ai.HIT, ai.MISS)
+        outcomes[boards] = np.where(hit, HIT, MISS)
+
+        boards, x, y, ids = boards[hit], x[hit], y[hit], ids[hit]
+        self.hit[boards, x, y] = True
+        self.remaining[boards, ids] -= 1
+        sunk = self.remaining[boards, ids] == 0
+        boards, ids = boards[sunk], ids[sunk]
+        outcomes[boards] = SUNK
+        self.sunk_ships[boards] += 1
+        if len(boards):
+            marks = self.marks[boards]
+            marks[self.ships[boards] == ids[:, None, None]] = ai.SUNK
+            self.marks[boards] = marks
+        return outcomes, hit_ids, self.game_over()